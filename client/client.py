@@ -11,6 +11,13 @@ import subprocess
 import re
 import ipaddress
 import shutil
+import threading
+import struct
+import heapq
+import random
+import gzip
+import errno
+import http.server
 from datetime import datetime
 
 # Configuration - can be modified as needed
@@ -18,29 +25,73 @@ SERVER_URL = 'http://localhost:8008'  # Socket.IO server address (Docker Nginx p
 NODE_NAME = socket.gethostname()  # Use hostname as node name, can be manually modified
 NODE_LOCATION = 'Local'  # Location
 CLIENT_VERSION = '1.3.1'  # 🔧 统一版本号
+EXTRA_SERVER_URLS = []  # 其他服务端地址（备用或同时上报），如 ['http://10.0.0.2:8008']
+SERVER_MODE = 'failover'  # 'failover': 主备切换，只连接一个服务端；'fanout': 同时上报到所有服务端
+SERVER_FAILOVER_THRESHOLD = 3  # 当前服务端连续连接/注册/发送失败多少次后切换到下一个
+SERVER_PRIMARY_RECHECK = 300  # 使用备用服务端时，每隔多久尝试切回主服务端（秒）
+RECONNECT_BASE = 2  # 重连退避的最小等待时间（秒）
+RECONNECT_MAX = 120  # 重连退避的最大等待时间（秒），服务端的 retry_after 提示可以超过该值
+STARTUP_JITTER = 5  # 启动时随机延迟首次连接的最长时间（秒），避免整个集群同时连接
+SOCKET_TRANSPORTS = None  # None: 先长轮询再升级；['websocket']: 直接使用websocket，省去轮询握手（需要 websocket-client）
+DNS_CACHE_TTL = 300  # 服务端域名解析结果的缓存时间（秒），0表示不缓存
+DNS_EVICT_AFTER_FAILURES = 3  # 连续连接失败多少次后丢弃缓存的地址重新解析（解析失败、网络不可达时立即丢弃）
+HAPPY_EYEBALLS_DELAY = 0.25  # 双栈服务端IPv6/IPv4连接尝试的间隔（秒，RFC 8305）
 
-# Network traffic statistics (for calculating rates)
-previous_net_io = None
-last_net_time = None
+# Disk usage collection policy
+DISK_USAGE_TIMEOUT = 2          # statvfs超时时间（秒），超时的挂载点会被隔离
+DISK_QUARANTINE_DURATION = 300  # 超时挂载点的隔离时间（秒）
+NETWORK_FS_POLICY = 'sample'    # 网络文件系统策略: 'sample'（低频采样）或 'exclude'（不统计）
+NETWORK_FS_INTERVAL = 300       # 网络文件系统的采样间隔（秒）
+DISK_FORECAST_HALFLIFE = 21600  # 磁盘写满预测的趋势半衰期（秒），越小越关注近期变化
+DISK_FORECAST_MIN_SPAN = 600    # 至少观察多长时间（秒）才给出写满预测
+DISK_FORECAST_RESIZE_RATIO = 0.02  # 总容量变化超过该比例才视为扩容/缩容（ZFS、btrfs、XFS的总容量会随元数据小幅波动）
+TOP_PROCESS_COUNT = 5           # 上报CPU/内存占用最高的进程数量
+TOP_INTERRUPT_COUNT = 0         # 上报中断速率最高的 /proc/interrupts 行数，0表示不采集
+COLLECTOR_INTERVALS = {}        # 按采集器名称覆盖采集间隔（秒），如 {'ip': 600, 'sockets': 60}
+COLLECT_WAIT = 3                # 每次上报最多等待采集器的时间（秒），未完成的结果留到下一次上报
+COLLECTOR_FAILURE_THRESHOLD = 3 # 采集器连续失败/超时多少次后熔断
+COLLECTOR_PROBE_BASE = 30       # 熔断后首次重新探测的等待时间（秒），之后每次失败翻倍
+COLLECTOR_PROBE_MAX = 1800      # 重新探测的最大等待时间（秒）
+# 自定义采集器（常驻worker进程），结果上报在 data['custom'][name] 下，如:
+# [{'name': 'queues', 'command': ['/opt/metrics/queues.py'], 'interval': 5, 'timeout': 5}]
+EXEC_COLLECTORS = []
+# 输出目标，每次采样会分发给所有sink，如:
+# [{'type': 'socketio'},
+#  {'type': 'statsd', 'host': '127.0.0.1', 'port': 8125},
+#  {'type': 'influx', 'host': '127.0.0.1', 'port': 8089} 或 {'type': 'influx', 'path': '/var/log/bserver.influx'},
+#  {'type': 'jsonl', 'path': '/var/log/bserver.jsonl', 'max_bytes': 10485760, 'backups': 3}]
+OUTPUT_SINKS = [{'type': 'socketio'}]
+SINK_QUEUE_SIZE = 100           # 每个sink的队列长度，满时丢弃最旧的采样
+METRICS_LISTEN = None           # 本地OpenMetrics端点监听地址，如 ('127.0.0.1', 9100)，None表示不启用
+RELAY_LISTEN = None             # 中继模式监听地址，如 ('0.0.0.0', 8009)，附近agent的SERVER_URL指向这里
+RELAY_FLUSH_INTERVAL = 1        # 中继批量转发间隔（秒），tcping结果立即转发
+RELAY_BATCH_SIZE = 200          # 每批最多转发的消息数
+RELAY_QUEUE_SIZE = 5000         # 上游不可用时最多缓存的下游消息数
+
+# Counter snapshots for rate calculation: {namespace: (monotonic_time, {counter: value})}
+# 采集器在各自线程中并行运行，读写快照表需要加锁
+_counter_snapshots = {}
+_counter_snapshots_lock = threading.Lock()
 
 # Prevent duplicate data sending
 # 这个变量将被移除，因为我们使用了更好的连接状态管理
 
-# Create Socket.IO client
-sio = socketio.Client(
-    reconnection=False,             # 🔧 禁用自动重连，由我们的简单机制处理
-    logger=False,                   # 禁用详细日志，避免日志过多
-    engineio_logger=False,          # 禁用Engine.IO日志
-    # Engine.IO特定配置
-    request_timeout=10,             # 请求超时10秒
-    http_session=None,              # 可以自定义HTTP会话
-    ssl_verify=True,                # SSL验证
-    websocket_extra_options={       # WebSocket额外选项
-        'timeout': 10,              # WebSocket连接超时
-        'ping_interval': 10,        # 心跳间隔
-        'ping_timeout': 20,         # 心跳超时
-    }
-)
+def create_socket_client():
+    """Create a Socket.IO client (one per server connection)"""
+    return socketio.Client(
+        reconnection=False,             # 🔧 禁用自动重连，由我们的简单机制处理
+        logger=False,                   # 禁用详细日志，避免日志过多
+        engineio_logger=False,          # 禁用Engine.IO日志
+        # Engine.IO特定配置
+        request_timeout=10,             # 请求超时10秒
+        http_session=None,              # 可以自定义HTTP会话
+        ssl_verify=True,                # SSL验证
+        websocket_extra_options={       # WebSocket额外选项
+            'timeout': 10,              # WebSocket连接超时
+            'ping_interval': 10,        # 心跳间隔
+            'ping_timeout': 20,         # 心跳超时
+        }
+    )
 
 # Cache system type detection results
 _cached_system_type = None
@@ -54,10 +105,10 @@ _cpu_info_cache = None
 _cache_timestamp = 0
 CACHE_DURATION = 60  # Cache system info for 60 seconds to reduce overhead
 
-# 🔧 增强全局状态跟踪
-_connection_stable = False
-_registration_confirmed = False
-_last_successful_data_send = 0
+# 服务端连接: 每个服务端一个Socket.IO客户端和独立的连接/注册状态，见 _create_server_connection
+_servers = []
+_active_server = 0          # failover模式下当前使用的服务端下标
+_probing_primary = False    # failover模式下是否正在尝试切回主服务端
 
 def detect_system_type():
     """智能检测系统类型 - 支持Windows, Linux, macOS"""
@@ -1461,48 +1512,318 @@ def detect_macos_system_type():
     print(f"[INFO] macOS系统检测完成: {system_type}")
     return system_type
 
+# 挂载表缓存（Linux下通过poll /proc/self/mountinfo 的POLLPRI事件感知变化）
+_mount_table = None
+_mount_table_time = 0
+_mountinfo_file = None
+_mountinfo_poller = None
+
+# statvfs探测状态
+_disk_usage_cache = {}        # mountpoint -> (monotonic_time, usage)
+_disk_usage_hung = {}         # mountpoint -> 尚未返回的探测完成事件
+_disk_usage_quarantine = {}   # mountpoint -> 隔离截止时间（monotonic）
+
+# 跳过的文件系统类型和挂载点
+IGNORED_FSTYPES = ['', 'squashfs', 'tmpfs', 'devtmpfs', 'proc', 'sysfs', 'devpts', 'cgroup', 'cgroup2', 'pstore', 'bpf', 'autofs']
+IGNORED_MOUNTPOINTS = ['/dev', '/proc', '/sys', '/run', '/boot/efi', '/run/lock', '/run/shm', '/run/user']
+
+# 网络文件系统类型（statvfs可能因服务端失联而永久阻塞）
+NETWORK_FSTYPES = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', '9p', 'afs', 'ceph', 'glusterfs',
+                   'fuse.glusterfs', 'fuse.sshfs', 'fuse.s3fs', 'fuse.rclone', 'lustre', 'gpfs', 'davfs'}
+
+def _unescape_mount_path(path):
+    """还原mountinfo中的八进制转义（如 \\040 表示空格）"""
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), path)
+
+def parse_mountinfo(content):
+    """解析 /proc/self/mountinfo 内容为挂载记录列表"""
+    mounts = []
+    for line in content.splitlines():
+        fields = line.split()
+        try:
+            separator = fields.index('-', 6)
+        except ValueError:
+            continue
+        if len(fields) < separator + 3:
+            continue
+        mounts.append({
+            'mount_id': int(fields[0]),
+            'dev_id': fields[2],                      # major:minor
+            'root': _unescape_mount_path(fields[3]),  # 挂载的子目录（bind mount/子卷）
+            'mountpoint': _unescape_mount_path(fields[4]),
+            'fstype': fields[separator + 1],
+            'device': _unescape_mount_path(fields[separator + 2])
+        })
+    return mounts
+
+def get_mount_table():
+    """获取挂载表 - 仅在挂载表变化时重新读取"""
+    global _mount_table, _mount_table_time, _mountinfo_file, _mountinfo_poller
+    
+    if platform.system() == 'Linux':
+        try:
+            if _mountinfo_file is None:
+                import select
+                _mountinfo_file = open('/proc/self/mountinfo', 'r')
+                _mountinfo_poller = select.poll()
+                _mountinfo_poller.register(_mountinfo_file.fileno(), select.POLLPRI | select.POLLERR)
+                changed = True
+            else:
+                # 挂载表变化时内核会置位POLLPRI|POLLERR，poll本身会清除该事件
+                changed = bool(_mountinfo_poller.poll(0))
+            
+            if changed or _mount_table is None:
+                _mountinfo_file.seek(0)
+                _mount_table = parse_mountinfo(_mountinfo_file.read())
+                _mount_table_time = time.time()
+            return _mount_table
+        except (OSError, ImportError, AttributeError) as e:
+            print(f"[Disk] mountinfo polling unavailable, falling back to psutil: {e}")
+            if _mountinfo_file is not None:
+                try:
+                    _mountinfo_file.close()
+                except Exception:
+                    pass
+            _mountinfo_file = None
+            _mountinfo_poller = None
+    
+    # 其他系统：按CACHE_DURATION定期刷新
+    if _mount_table is None or time.time() - _mount_table_time > CACHE_DURATION:
+        _mount_table = [{
+            'mount_id': None,
+            'dev_id': None,
+            'root': None,
+            'mountpoint': partition.mountpoint,
+            'fstype': partition.fstype,
+            'device': partition.device
+        } for partition in psutil.disk_partitions()]
+        _mount_table_time = time.time()
+    return _mount_table
+
+# 叠加文件系统：statvfs返回的是底层文件系统的数据
+STACKED_FSTYPES = {'overlay', 'aufs'}
+
+def read_filesystem_usage(mountpoint):
+    """读取单个挂载点的容量和inode使用情况"""
+    if hasattr(os, 'statvfs'):
+        st = os.statvfs(mountpoint)
+        # 与psutil.disk_usage保持一致：free为非特权用户可用空间
+        return {
+            'total': st.f_blocks * st.f_frsize,
+            'used': (st.f_blocks - st.f_bfree) * st.f_frsize,
+            'free': st.f_bavail * st.f_frsize,
+            'inodes_total': st.f_files,
+            'inodes_free': st.f_ffree
+        }
+    usage = psutil.disk_usage(mountpoint)
+    return {
+        'total': usage.total,
+        'used': usage.used,
+        'free': usage.free,
+        'inodes_total': 0,
+        'inodes_free': 0
+    }
+
+def aggregate_filesystems(entries):
+    """按后端文件系统去重挂载点（bind mount、btrfs/ZFS子卷、overlay），entries为(mount, usage)列表"""
+    filesystems = {}
+    by_geometry = {}  # 容量 -> 文件系统ID，用于把overlay归并到其底层文件系统
+    zfs_datasets = {}  # ZFS存储池 -> 已统计的数据集，重复挂载的数据集只统计一次
+    
+    # 先处理真实文件系统，再处理叠加文件系统
+    ordered = sorted(entries, key=lambda entry: entry[0]['fstype'] in STACKED_FSTYPES)
+    for mount, usage in ordered:
+        fstype = mount['fstype']
+        if fstype == 'zfs':
+            # 同一存储池的数据集共享可用空间
+            fs_id = 'zfs:' + mount['device'].split('/')[0]
+        elif fstype in STACKED_FSTYPES:
+            fs_id = by_geometry.get(usage['total'], f"{fstype}:{usage['total']}")
+        elif mount['dev_id']:
+            # mountinfo的major:minor对应超级块，bind mount和btrfs子卷共享同一个值
+            fs_id = mount['dev_id']
+        else:
+            fs_id = mount['device'] or mount['mountpoint']
+        
+        fs = filesystems.get(fs_id)
+        if fstype == 'zfs':
+            # 每个数据集有独立的major:minor，bind mount共享该值
+            dataset = mount['dev_id'] or mount['device']
+            datasets = zfs_datasets.setdefault(fs_id, set())
+            is_new_dataset = dataset not in datasets
+            datasets.add(dataset)
+        if fs is None:
+            filesystems[fs_id] = {
+                'id': fs_id,
+                'device': mount['device'],
+                'fstype': fstype,
+                'mountpoints': [mount['mountpoint']],
+                **usage
+            }
+            by_geometry.setdefault(usage['total'], fs_id)
+            continue
+        
+        fs['mountpoints'].append(mount['mountpoint'])
+        if fstype == 'zfs' and is_new_dataset:
+            # ZFS数据集：已用空间累加，可用空间为存储池共享值
+            fs['used'] += usage['used']
+            fs['free'] = max(fs['free'], usage['free'])
+            fs['total'] = fs['used'] + fs['free']
+            inodes_used = (fs['inodes_total'] - fs['inodes_free']) + (usage['inodes_total'] - usage['inodes_free'])
+            fs['inodes_free'] = max(fs['inodes_free'], usage['inodes_free'])
+            fs['inodes_total'] = inodes_used + fs['inodes_free']
+    
+    result = []
+    for fs in filesystems.values():
+        inodes_used = fs['inodes_total'] - fs['inodes_free']
+        fs['percent'] = round((fs['used'] / fs['total']) * 100, 1) if fs['total'] > 0 else 0
+        fs['inodes_used'] = inodes_used
+        fs['inodes_percent'] = round((inodes_used / fs['inodes_total']) * 100, 1) if fs['inodes_total'] > 0 else 0
+        result.append(fs)
+    return result
+
+# 每个文件系统的写满预测状态: 指数衰减的加权回归累加和（O(1)内存）
+_disk_forecasts = {}
+
+def _disk_forecast_result(state):
+    """根据回归累加和计算可用空间下降速度和预计写满时间"""
+    w, st, sy, stt, sty = state['w'], state['t'], state['y'], state['tt'], state['ty']
+    denominator = w * stt - st * st
+    if state['time'] - state['start'] < DISK_FORECAST_MIN_SPAN or w <= 0 or denominator <= 0:
+        return {'fill_rate': None, 'full_eta': None}
+    
+    slope = (w * sty - st * sy) / denominator          # 可用空间变化速度（字节/秒）
+    fitted_free = state['free'] + (sy - slope * st) / w  # 当前时刻的拟合可用空间
+    if slope >= 0:
+        return {'fill_rate': round(-slope, 1), 'full_eta': None}
+    return {'fill_rate': round(-slope, 1), 'full_eta': int(max(fitted_free, 0) / -slope)}
+
+def update_disk_forecast(fs_id, sample_time, free, total):
+    """用指数加权线性回归预测文件系统写满时间（秒）"""
+    state = _disk_forecasts.get(fs_id)
+    if state is None or abs(total - state['total']) > state['total'] * DISK_FORECAST_RESIZE_RATIO:
+        # 首次出现或文件系统被扩容/缩容，重新开始拟合；总容量的小幅波动不影响已有趋势
+        state = {'start': sample_time, 'time': sample_time, 'free': free, 'total': total,
+                 'w': 1.0, 't': 0.0, 'y': 0.0, 'tt': 0.0, 'ty': 0.0}
+        _disk_forecasts[fs_id] = state
+        return _disk_forecast_result(state)
+    
+    if sample_time <= state['time']:
+        return _disk_forecast_result(state)  # 缓存样本，不重复计入
+    
+    # 历史样本按时间衰减，并把坐标原点平移到最新样本（t=0, y=free），保证数值稳定
+    dt = sample_time - state['time']
+    dy = free - state['free']
+    decay = 0.5 ** (dt / DISK_FORECAST_HALFLIFE)
+    w, st, sy, stt, sty = (state[key] * decay for key in ('w', 't', 'y', 'tt', 'ty'))
+    state['ty'] = sty - dy * st - dt * sy + dt * dy * w
+    state['tt'] = stt - 2 * dt * st + dt * dt * w
+    state['t'] = st - dt * w
+    state['y'] = sy - dy * w
+    state['w'] = w + 1.0  # 新样本位于原点，只贡献权重
+    state['time'] = sample_time
+    state['free'] = free
+    state['total'] = total
+    
+    return _disk_forecast_result(state)
+
+def _start_disk_usage_probe(mountpoint):
+    """在独立线程中执行statvfs，避免失联的挂载点阻塞主循环"""
+    result = {}
+    done = threading.Event()
+    
+    def probe():
+        try:
+            result['usage'] = read_filesystem_usage(mountpoint)
+        except Exception as e:
+            result['error'] = e
+        finally:
+            done.set()
+    
+    threading.Thread(target=probe, name=f"statvfs:{mountpoint}", daemon=True).start()
+    return done, result
+
+def _is_disk_quarantined(mountpoint, now):
+    """检查挂载点是否处于隔离状态"""
+    hung = _disk_usage_hung.get(mountpoint)
+    if hung is not None:
+        if not hung.is_set():
+            return True  # 上一次statvfs仍未返回
+        del _disk_usage_hung[mountpoint]
+    return _disk_usage_quarantine.get(mountpoint, 0) > now
+
 def get_all_disk_usage():
-    """获取所有挂载分区的磁盘使用情况总和"""
+    """获取所有挂载分区的磁盘使用情况总和 - statvfs带超时，失联挂载点自动隔离"""
     try:
         total_size = 0
         total_used = 0
         total_free = 0
-        partitions_info = []
+        quarantined = []
         
-        # 获取所有挂载分区
-        partitions = psutil.disk_partitions()
+        now = time.monotonic()
+        usages = {}
+        sample_times = {}
+        probes = {}
         
-        for partition in partitions:
-            try:
-                # 跳过某些特殊的文件系统类型
-                if partition.fstype in ['', 'squashfs', 'tmpfs', 'devtmpfs', 'proc', 'sysfs', 'devpts', 'cgroup', 'cgroup2', 'pstore', 'bpf', 'autofs']:
+        for mount in get_mount_table():
+            mountpoint = mount['mountpoint']
+            fstype = mount['fstype']
+            
+            # 跳过某些特殊的文件系统类型和挂载点
+            if fstype in IGNORED_FSTYPES or mountpoint in IGNORED_MOUNTPOINTS:
+                continue
+            if mountpoint in usages or mountpoint in probes:
+                continue  # 同一挂载点被多次挂载（overmount），只统计一次
+            
+            if _is_disk_quarantined(mountpoint, now):
+                quarantined.append(mountpoint)
+                continue
+            
+            # 网络文件系统按策略排除或低频采样
+            if fstype in NETWORK_FSTYPES:
+                if NETWORK_FS_POLICY == 'exclude':
                     continue
-                
-                # 跳过某些特殊的挂载点
-                if partition.mountpoint in ['/dev', '/proc', '/sys', '/run', '/boot/efi', '/run/lock', '/run/shm', '/run/user']:
+                cached = _disk_usage_cache.get(mountpoint)
+                if cached and now - cached[0] < NETWORK_FS_INTERVAL:
+                    usages[mountpoint] = (mount, cached[1])
+                    sample_times[mountpoint] = cached[0]
                     continue
-                
-                # 获取分区使用情况
-                disk_usage = psutil.disk_usage(partition.mountpoint)
-                
-                # 累加到总量
-                total_size += disk_usage.total
-                total_used += disk_usage.used
-                total_free += disk_usage.free
-                
-                # 记录分区信息（用于调试）
-                partitions_info.append({
-                    'device': partition.device,
-                    'mountpoint': partition.mountpoint,
-                    'fstype': partition.fstype,
-                    'size_gb': round(disk_usage.total / (1024**3), 2),
-                    'used_gb': round(disk_usage.used / (1024**3), 2),
-                    'percent': round((disk_usage.used / disk_usage.total) * 100, 1) if disk_usage.total > 0 else 0
-                })
-                
-            except (PermissionError, OSError, FileNotFoundError):
-                # 某些分区可能没有权限访问或者不存在，跳过
+            
+            probes[mountpoint] = (mount, _start_disk_usage_probe(mountpoint))
+        
+        # 所有挂载点并行探测，共用一个截止时间
+        deadline = now + DISK_USAGE_TIMEOUT
+        for mountpoint, (mount, (done, result)) in probes.items():
+            if not done.wait(max(0, deadline - time.monotonic())):
+                print(f"[Disk] ⚠️  statvfs timed out on {mountpoint} ({mount['fstype']}), quarantining for {DISK_QUARANTINE_DURATION}s")
+                _disk_usage_hung[mountpoint] = done
+                _disk_usage_quarantine[mountpoint] = time.monotonic() + DISK_QUARANTINE_DURATION
+                _disk_usage_cache.pop(mountpoint, None)
+                quarantined.append(mountpoint)
                 continue
+            if 'usage' in result:
+                sample_times[mountpoint] = time.monotonic()
+                _disk_usage_cache[mountpoint] = (sample_times[mountpoint], result['usage'])
+                usages[mountpoint] = (mount, result['usage'])
+            # 某些分区可能没有权限访问或者不存在，跳过
+        
+        # 同一文件系统的多个挂载点只统计一次
+        filesystems = aggregate_filesystems(list(usages.values()))
+        for fs in filesystems:
+            # 累加到总量
+            total_size += fs['total']
+            total_used += fs['used']
+            total_free += fs['free']
+            
+            # 更新写满时间预测
+            sample_time = max(sample_times[mountpoint] for mountpoint in fs['mountpoints'])
+            fs.update(update_disk_forecast(fs['id'], sample_time, fs['free'], fs['total']))
+        
+        # 清理长时间未出现的文件系统的预测状态
+        for fs_id in [fs_id for fs_id, state in _disk_forecasts.items() if now - state['time'] > DISK_FORECAST_HALFLIFE]:
+            del _disk_forecasts[fs_id]
+        
+        full_etas = [fs['full_eta'] for fs in filesystems if fs['full_eta'] is not None]
         
         # 计算总体使用率
         total_percent = round((total_used / total_size) * 100, 1) if total_size > 0 else 0
@@ -1512,7 +1833,10 @@ def get_all_disk_usage():
             'total_used': total_used,
             'total_free': total_free,
             'percent': total_percent,
-            'partitions_count': len(partitions_info),
+            'partitions_count': len(filesystems),
+            'filesystems': filesystems,
+            'full_eta': min(full_etas) if full_etas else None,
+            'quarantined': quarantined,
             'detail': f"{total_used/(1024**3):.2f} GiB / {total_size/(1024**3):.2f} GiB"
         }
         
@@ -1527,6 +1851,9 @@ def get_all_disk_usage():
                 'total_free': disk.free,
                 'percent': round((disk.used / disk.total) * 100, 1),
                 'partitions_count': 1,
+                'filesystems': [],
+                'full_eta': None,
+                'quarantined': [],
                 'detail': f"{disk.used/(1024**3):.2f} GiB / {disk.total/(1024**3):.2f} GiB"
             }
         except:
@@ -1536,12 +1863,279 @@ def get_all_disk_usage():
                 'total_free': 0,
                 'percent': 0,
                 'partitions_count': 0,
+                'filesystems': [],
+                'full_eta': None,
+                'quarantined': [],
                 'detail': "0 GiB / 0 GiB"
             }
 
-def get_cpu_usage():
-    """获取更精确的CPU使用率 - 性能优化版本"""
+# 容器类系统类型：在这些环境中使用cgroup数据替代宿主机的/proc数据
+CONTAINER_SYSTEM_TYPES = {'Docker', 'LXC', 'Podman', 'Kubernetes', 'Containerd', 'Container', 'Systemd-nspawn', 'rkt'}
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# cgroup路径缓存: None表示尚未检测，{}表示未受限
+_cgroup_paths = None
+_cgroup_paths_lock = threading.Lock()
+
+def _read_cgroup_value(path):
+    """读取单值cgroup文件，'max'表示不限制"""
+    with open(path, 'r') as f:
+        value = f.read().strip()
+    return None if value == 'max' else int(value)
+
+def _resolve_cgroup_dir(mount, path):
+    """拼接cgroup目录；启用cgroup命名空间时挂载点本身就是当前cgroup"""
+    relative = path.strip('/')
+    if not relative:
+        return mount
+    candidate = os.path.join(mount, relative)
+    return candidate if os.path.isdir(candidate) else mount
+
+def get_cgroup_paths():
+    """检测当前进程所在的cgroup（v1/v2），仅在容器中运行时启用"""
+    if _cgroup_paths is not None:
+        return _cgroup_paths
+    # 采集器并行运行，检测完成前其他采集器不能读到未初始化的结果
+    with _cgroup_paths_lock:
+        if _cgroup_paths is None:
+            _detect_cgroup_paths()
+    return _cgroup_paths
+
+def _detect_cgroup_paths():
+    global _cgroup_paths
+    if platform.system() != 'Linux' or detect_system_type() not in CONTAINER_SYSTEM_TYPES:
+        _cgroup_paths = {}
+        return
+    
+    try:
+        controllers = {}
+        with open('/proc/self/cgroup', 'r') as f:
+            for line in f:
+                parts = line.strip().split(':', 2)
+                if len(parts) == 3:
+                    for name in parts[1].split(','):
+                        controllers[name] = parts[2]
+        
+        if '' in controllers and os.path.exists(os.path.join(CGROUP_ROOT, 'cgroup.controllers')):
+            cgroup_dir = _resolve_cgroup_dir(CGROUP_ROOT, controllers[''])
+            _cgroup_paths = {'version': 2, 'memory': cgroup_dir, 'cpu': cgroup_dir}
+        else:
+            def v1_dir(*names):
+                for name in names:
+                    mount = os.path.join(CGROUP_ROOT, name)
+                    if os.path.isdir(mount):
+                        return _resolve_cgroup_dir(mount, controllers.get(names[-1], '/'))
+                return None
+            _cgroup_paths = {
+                'version': 1,
+                'memory': v1_dir('memory'),
+                'cpu': v1_dir('cpu,cpuacct', 'cpu'),
+                'cpuacct': v1_dir('cpu,cpuacct', 'cpuacct')
+            }
+        print(f"[Cgroup] Running in container, using cgroup v{_cgroup_paths['version']} metrics: {_cgroup_paths}")
+    except (OSError, ValueError) as e:
+        print(f"[Cgroup] cgroup detection failed, using host-wide metrics: {e}")
+        _cgroup_paths = {}
+
+def get_cgroup_stats():
+    """获取容器的cgroup内存和CPU限制、使用量与限流情况（未受限时返回None）"""
+    paths = get_cgroup_paths()
+    if not paths:
+        return None
+    try:
+        if paths['version'] == 2:
+            memory_dir = paths['memory']
+            memory_usage = _read_cgroup_value(os.path.join(memory_dir, 'memory.current'))
+            memory_limit = _read_cgroup_value(os.path.join(memory_dir, 'memory.max'))
+            inactive_file = read_proc_counters(os.path.join(memory_dir, 'memory.stat'), {'inactive_file'}).get('inactive_file', 0)
+            
+            cpu_stat = read_proc_counters(os.path.join(paths['cpu'], 'cpu.stat'),
+                                          {'usage_usec', 'nr_periods', 'nr_throttled', 'throttled_usec'})
+            usage_us = cpu_stat['usage_usec']
+            throttled_us = cpu_stat.get('throttled_usec', 0)
+            with open(os.path.join(paths['cpu'], 'cpu.max'), 'r') as f:
+                quota, period = f.read().split()
+            quota = None if quota == 'max' else int(quota)
+            period = int(period)
+        else:
+            memory_dir = paths['memory']
+            memory_usage = _read_cgroup_value(os.path.join(memory_dir, 'memory.usage_in_bytes'))
+            memory_limit = _read_cgroup_value(os.path.join(memory_dir, 'memory.limit_in_bytes'))
+            inactive_file = read_proc_counters(os.path.join(memory_dir, 'memory.stat'), {'total_inactive_file'}).get('total_inactive_file', 0)
+            
+            usage_us = _read_cgroup_value(os.path.join(paths['cpuacct'], 'cpuacct.usage')) // 1000
+            cpu_stat = read_proc_counters(os.path.join(paths['cpu'], 'cpu.stat'), {'nr_periods', 'nr_throttled', 'throttled_time'})
+            throttled_us = cpu_stat.get('throttled_time', 0) // 1000
+            quota = _read_cgroup_value(os.path.join(paths['cpu'], 'cpu.cfs_quota_us'))
+            period = _read_cgroup_value(os.path.join(paths['cpu'], 'cpu.cfs_period_us'))
+            if quota is not None and quota <= 0:
+                quota = None  # -1 表示不限制
+        
+        # 限制大于宿主机内存等同于不限制（v1中不限制时为一个极大值）
+        if memory_limit is not None and memory_limit >= psutil.virtual_memory().total:
+            memory_limit = None
+        
+        # 可用CPU核数：CFS配额优先，否则为可调度的CPU数量
+        if quota and period:
+            cpu_limit = quota / period
+        elif hasattr(os, 'sched_getaffinity'):
+            cpu_limit = len(os.sched_getaffinity(0))
+        else:
+            cpu_limit = psutil.cpu_count() or 1
+        
+        rates = compute_counter_rates('cgroup_cpu', {
+            'usage_us': usage_us,
+            'nr_periods': cpu_stat.get('nr_periods', 0),
+            'nr_throttled': cpu_stat.get('nr_throttled', 0),
+            'throttled_us': throttled_us
+        })
+        cpu_percent = None
+        throttled_percent = 0.0
+        if rates:
+            cpu_percent = round(rates['usage_us'] / 1e6 / cpu_limit * 100, 1)
+            if rates['nr_periods'] > 0:
+                throttled_percent = round(rates['nr_throttled'] / rates['nr_periods'] * 100, 1)
+        
+        # 工作集 = 使用量 - 非活跃文件缓存（与docker stats一致）
+        memory_used = max(memory_usage - inactive_file, 0)
+        return {
+            'version': paths['version'],
+            'memory_used': memory_used,
+            'memory_limit': memory_limit,
+            'memory_percent': round(memory_used / memory_limit * 100, 1) if memory_limit else None,
+            'cpu_limit': round(cpu_limit, 2),
+            'cpu_percent': cpu_percent,
+            'throttled_percent': throttled_percent,
+            'throttled_time': round(rates.get('throttled_us', 0) / 1e6, 3)  # 每秒被限流的时间（秒）
+        }
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[Cgroup] Error reading cgroup stats: {e}")
+        return None
+
+# 容器cgroup（v2）位置: (父目录, 目录名匹配规则, 运行时)
+CONTAINER_CGROUP_PATTERNS = [
+    ('system.slice', re.compile(r'^docker-([0-9a-f]{12,})\.scope$'), 'docker'),   # systemd cgroup驱动
+    ('docker', re.compile(r'^([0-9a-f]{12,})$'), 'docker'),                        # cgroupfs cgroup驱动
+    ('machine.slice', re.compile(r'^libpod-([0-9a-f]{12,})\.scope$'), 'podman'),
+    ('', re.compile(r'^lxc\.payload\.(.+)$'), 'lxc'),                              # LXC 4.0+
+    ('lxc', re.compile(r'^(?!lxc\.monitor)(.+)$'), 'lxc')                           # 旧版LXC
+]
+
+# 容器cgroup目录的文件描述符缓存: path -> (fd, inode)（跨采样周期复用，避免重复路径解析）
+# 同一路径的cgroup可能被删除后重建（如LXC容器重启），inode变化时需要重新打开
+_container_dir_fds = {}
+
+def _read_cgroup_file_at(dir_fd, name):
+    """通过目录描述符读取cgroup文件，文件不存在（控制器未启用）时返回None"""
+    try:
+        fd = os.open(name, os.O_RDONLY, dir_fd=dir_fd)
+    except FileNotFoundError:
+        return None
+    try:
+        return os.read(fd, 65536).decode()
+    finally:
+        os.close(fd)
+
+def _forget_container(path):
+    """关闭已消失容器的目录描述符并清理速率状态"""
+    cached = _container_dir_fds.pop(path, None)
+    if cached is not None:
+        try:
+            os.close(cached[0])
+        except OSError:
+            pass
+    with _counter_snapshots_lock:
+        _counter_snapshots.pop(f'container:{path}', None)
+
+def get_container_stats(root=CGROUP_ROOT):
+    """遍历cgroup v2层级，获取每个Docker/Podman/LXC容器的CPU、内存、IO和进程数（不依赖Docker守护进程）"""
+    if not os.path.exists(os.path.join(root, 'cgroup.controllers')):
+        return None
+    
+    try:
+        containers = {}
+        for parent, pattern, runtime in CONTAINER_CGROUP_PATTERNS:
+            parent_dir = os.path.join(root, parent) if parent else root
+            try:
+                with os.scandir(parent_dir) as entries:
+                    for entry in entries:
+                        match = pattern.match(entry.name)
+                        if match and entry.is_dir(follow_symlinks=False):
+                            containers[entry.path] = (match.group(1), runtime, entry.inode())
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        
+        # 清理已删除的容器
+        for path in [path for path in _container_dir_fds if path not in containers]:
+            _forget_container(path)
+        
+        now = time.monotonic()
+        result = []
+        for path, (container_id, runtime, inode) in containers.items():
+            try:
+                cached = _container_dir_fds.get(path)
+                if cached is not None and cached[1] != inode:
+                    # 目录已被重建，旧描述符指向已删除的cgroup
+                    _forget_container(path)
+                    cached = None
+                if cached is None:
+                    dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+                    _container_dir_fds[path] = (dir_fd, inode)
+                else:
+                    dir_fd = cached[0]
+                
+                cpu_stat = _read_cgroup_file_at(dir_fd, 'cpu.stat') or ''
+                memory_current = _read_cgroup_file_at(dir_fd, 'memory.current')
+                io_stat = _read_cgroup_file_at(dir_fd, 'io.stat') or ''
+                pids_current = _read_cgroup_file_at(dir_fd, 'pids.current')
+            except OSError:
+                # 容器在读取过程中被删除
+                _forget_container(path)
+                continue
+            
+            usage_us = 0
+            for line in cpu_stat.splitlines():
+                if line.startswith('usage_usec '):
+                    usage_us = int(line.split()[1])
+                    break
+            
+            # io.stat 每行一个设备: "8:0 rbytes=... wbytes=... rios=... wios=..."
+            read_bytes = write_bytes = 0
+            for line in io_stat.splitlines():
+                for field in line.split()[1:]:
+                    key, _, value = field.partition('=')
+                    if key == 'rbytes':
+                        read_bytes += int(value)
+                    elif key == 'wbytes':
+                        write_bytes += int(value)
+            
+            rates = compute_counter_rates(f'container:{path}', {
+                'usage_us': usage_us,
+                'read_bytes': read_bytes,
+                'write_bytes': write_bytes
+            }, now=now)
+            result.append({
+                'id': container_id[:12],
+                'runtime': runtime,
+                'cpu': round(rates.get('usage_us', 0.0) / 1e6 * 100, 1),  # 单核为100%
+                'memory': int(memory_current) if memory_current else 0,
+                'io_read': int(rates.get('read_bytes', 0)),
+                'io_write': int(rates.get('write_bytes', 0)),
+                'pids': int(pids_current) if pids_current else 0
+            })
+        
+        result.sort(key=lambda container: container['cpu'], reverse=True)
+        return result
+    except (OSError, ValueError) as e:
+        print(f"[Containers] Error walking cgroup hierarchy: {e}")
+        return None
+
+def get_cpu_usage(cgroup=None):
+    """获取更精确的CPU使用率 - 性能优化版本（容器中使用cgroup配额计算）"""
     try:
+        if cgroup and cgroup['cpu_percent'] is not None:
+            return int(round(min(cgroup['cpu_percent'], 100)))
+        
         # 使用非阻塞方式获取CPU使用率
         # 第一次调用初始化，返回值可能不准确
         cpu_percent = psutil.cpu_percent(interval=None)
@@ -1558,15 +2152,102 @@ def get_cpu_usage():
         except:
             return 0
 
-def get_memory_info():
-    """获取更详细的内存信息"""
+# /proc/meminfo 字段 -> 内存明细字段名
+MEMINFO_FIELDS = {
+    b'Buffers': 'buffers',
+    b'Cached': 'cached',
+    b'AnonPages': 'anon',
+    b'Shmem': 'shmem',
+    b'Dirty': 'dirty',
+    b'Writeback': 'writeback',
+    b'SReclaimable': 'slab_reclaimable',
+    b'SUnreclaim': 'slab_unreclaimable',
+    b'HugePages_Total': 'hugepages_total',
+    b'HugePages_Free': 'hugepages_free',
+    b'Hugepagesize': 'hugepage_size',
+    b'Zswap': 'zswap',          # zswap压缩池占用
+    b'Zswapped': 'zswapped'     # 存入zswap的原始数据量
+}
+
+# 常开的 /proc/meminfo 文件和复用的读取缓冲区
+_meminfo_file = None
+_meminfo_buffer = bytearray(8192)
+
+def get_memory_breakdown():
+    """一次读取 /proc/meminfo 获取内存明细：缓存、脏页、slab、共享内存、大页、zram/zswap（字节，仅Linux）"""
+    global _meminfo_file, _meminfo_buffer
+    if platform.system() != 'Linux':
+        return None
+    try:
+        if _meminfo_file is None:
+            _meminfo_file = open('/proc/meminfo', 'rb', buffering=0)
+        _meminfo_file.seek(0)
+        length = _meminfo_file.readinto(_meminfo_buffer)
+        while length == len(_meminfo_buffer):
+            # 缓冲区不够大，扩容后重新读取
+            _meminfo_buffer = bytearray(len(_meminfo_buffer) * 2)
+            _meminfo_file.seek(0)
+            length = _meminfo_file.readinto(_meminfo_buffer)
+        
+        values = {}
+        for line in bytes(_meminfo_buffer[:length]).split(b'\n'):
+            name, _, rest = line.partition(b':')
+            field = MEMINFO_FIELDS.get(name)
+            if field is None:
+                continue
+            parts = rest.split()
+            values[field] = int(parts[0]) * 1024 if len(parts) > 1 else int(parts[0])  # kB或页数
+        
+        hugepage_size = values.pop('hugepage_size', 0)
+        hugepages_total = values.pop('hugepages_total', 0)
+        hugepages_free = values.pop('hugepages_free', 0)
+        values['hugepages_total'] = hugepages_total * hugepage_size
+        values['hugepages_used'] = (hugepages_total - hugepages_free) * hugepage_size
+        
+        # zram设备: mm_stat = 原始数据量 压缩后大小 实际占用内存 ...
+        zram_devices = [name for name in os.listdir('/sys/block') if name.startswith('zram')] if os.path.isdir('/sys/block') else []
+        if zram_devices:
+            zram = [0, 0, 0]
+            for device in zram_devices:
+                try:
+                    with open(f'/sys/block/{device}/mm_stat', 'r') as f:
+                        mm_stat = [int(value) for value in f.read().split()[:3]]
+                except (OSError, ValueError):
+                    continue
+                zram = [total + value for total, value in zip(zram, mm_stat)]
+            values['zram_original'], values['zram_compressed'], values['zram_used'] = zram
+        
+        return values
+    except (OSError, ValueError, IndexError) as e:
+        print(f"[Memory] Error reading /proc/meminfo: {e}")
+        return None
+
+def get_memory_info(cgroup=None):
+    """获取更详细的内存信息（容器中使用cgroup内存限制）"""
     try:
         memory = psutil.virtual_memory()
         swap = psutil.swap_memory()
         
         # 计算更精确的内存使用率（排除缓存）
         # 在Linux上，available字段比free更准确
-        if hasattr(memory, 'available'):
+        if cgroup and cgroup['memory_limit']:
+            # 容器内存上限替代宿主机总内存
+            total = cgroup['memory_limit']
+            actual_used = cgroup['memory_used']
+            actual_percent = cgroup['memory_percent']
+            return {
+                'percent': int(actual_percent),
+                'total': total,
+                'used': actual_used,
+                'available': max(total - actual_used, 0),
+                'swap_total': swap.total,
+                'swap_used': swap.used,
+                'swap_percent': round(swap.percent, 1),
+                'detail': f"{actual_used/(1024**2):.2f} MiB / {total/(1024**2):.2f} MiB",
+                'swap_detail': f"{swap.used/(1024**2):.2f} MiB / {swap.total/(1024**2):.2f} MiB",
+                'breakdown': None  # 宿主机的/proc/meminfo明细对容器没有意义
+            }
+        elif hasattr(memory, 'available'):
             actual_used = memory.total - memory.available
             actual_percent = round((actual_used / memory.total) * 100, 1)
         else:
@@ -1582,7 +2263,8 @@ def get_memory_info():
             'swap_used': swap.used,
             'swap_percent': round(swap.percent, 1),
             'detail': f"{actual_used/(1024**2):.2f} MiB / {memory.total/(1024**2):.2f} MiB",
-            'swap_detail': f"{swap.used/(1024**2):.2f} MiB / {swap.total/(1024**2):.2f} MiB"
+            'swap_detail': f"{swap.used/(1024**2):.2f} MiB / {swap.total/(1024**2):.2f} MiB",
+            'breakdown': get_memory_breakdown()
         }
     except Exception as e:
         print(f"[Memory] Error getting memory info: {e}")
@@ -1595,9 +2277,104 @@ def get_memory_info():
             'swap_used': 0,
             'swap_percent': 0,
             'detail': "0 MiB / 0 MiB",
-            'swap_detail': "0 MiB / 0 MiB"
+            'swap_detail': "0 MiB / 0 MiB",
+            'breakdown': None
         }
 
+NUMA_SYSFS_ROOT = '/sys/devices/system/node'
+
+# NUMA节点缓存: None表示尚未检测，[]表示单节点系统（跳过采集）
+_numa_nodes = None
+
+def parse_cpulist(cpulist):
+    """解析CPU列表格式（如 "0-7,16-23"）"""
+    cpus = []
+    for part in cpulist.strip().split(','):
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+def _discover_numa_nodes(node_root):
+    """发现NUMA节点及其CPU列表，单节点系统返回空列表"""
+    try:
+        nodes = sorted(int(entry[4:]) for entry in os.listdir(node_root) if re.match(r'^node\d+$', entry))
+    except OSError:
+        return []
+    if len(nodes) <= 1:
+        return []
+    result = []
+    for node in nodes:
+        try:
+            with open(os.path.join(node_root, f'node{node}', 'cpulist'), 'r') as f:
+                cpus = parse_cpulist(f.read())
+        except (OSError, ValueError):
+            cpus = []
+        result.append((node, cpus))
+    return result
+
+def get_numa_stats(node_root=NUMA_SYSFS_ROOT):
+    """获取每个NUMA节点的内存、CPU使用率和跨节点分配速率（单节点系统返回None）"""
+    global _numa_nodes
+    if platform.system() != 'Linux':
+        return None
+    if _numa_nodes is None:
+        _numa_nodes = _discover_numa_nodes(node_root)
+    if not _numa_nodes:
+        return None
+    
+    try:
+        # /proc/stat 每CPU一行: cpuN user nice system idle iowait irq softirq steal ...
+        cpu_times = {}
+        with open('/proc/stat', 'r') as f:
+            for line in f:
+                if not line.startswith('cpu'):
+                    break
+                fields = line.split()
+                if fields[0] == 'cpu':
+                    continue
+                values = [int(value) for value in fields[1:9]]
+                cpu_times[int(fields[0][3:])] = (sum(values) - values[3] - values[4], sum(values))
+        
+        now = time.monotonic()
+        nodes = []
+        for node, cpus in _numa_nodes:
+            node_dir = os.path.join(node_root, f'node{node}')
+            
+            # meminfo每行格式: "Node 0 MemTotal:  16384 kB"
+            meminfo = {}
+            with open(os.path.join(node_dir, 'meminfo'), 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 4:
+                        meminfo[parts[2].rstrip(':')] = int(parts[3]) * 1024
+            mem_total = meminfo.get('MemTotal', 0)
+            # 与全局内存口径一致：排除页缓存和可回收内核内存
+            mem_used = max(mem_total - meminfo.get('MemFree', 0) - meminfo.get('FilePages', 0)
+                           - meminfo.get('KReclaimable', meminfo.get('SReclaimable', 0)), 0)
+            
+            numastat = read_proc_counters(os.path.join(node_dir, 'numastat'), {'numa_hit', 'numa_miss', 'numa_foreign', 'other_node'})
+            busy = sum(cpu_times[cpu][0] for cpu in cpus if cpu in cpu_times)
+            total = sum(cpu_times[cpu][1] for cpu in cpus if cpu in cpu_times)
+            rates = compute_counter_rates(f'numa:{node}', {'cpu_busy': busy, 'cpu_total': total, **numastat}, now=now)
+            
+            nodes.append({
+                'node': node,
+                'cpus': len(cpus),
+                'cpu': round(rates['cpu_busy'] / rates['cpu_total'] * 100, 1) if rates.get('cpu_total') else 0.0,
+                'mem_total': mem_total,
+                'mem_used': mem_used,
+                'mem_percent': round(mem_used / mem_total * 100, 1) if mem_total else 0.0,
+                'numa_miss': round(rates.get('numa_miss', 0.0), 1),      # 每秒本应分配到本节点却分配到其他节点的页数
+                'numa_foreign': round(rates.get('numa_foreign', 0.0), 1),  # 每秒本节点请求被分配到其他节点的页数
+                'other_node': round(rates.get('other_node', 0.0), 1)
+            })
+        return nodes
+    except (OSError, ValueError) as e:
+        print(f"[NUMA] Error reading NUMA stats: {e}")
+        return None
+
 def get_cpu_info():
     """获取CPU详细信息：型号、频率、核心数、虚拟化状态 - 优化的Windows兼容版本"""
     global _cached_cpu_info
@@ -1826,6 +2603,123 @@ def get_cpu_info():
         
         return fallback_result
 
+CPU_SYSFS_ROOT = '/sys/devices/system/cpu'
+THERMAL_SYSFS_ROOT = '/sys/class/thermal'
+
+# 常开的传感器文件描述符（sysfs属性可通过pread从偏移0重复读取最新值）
+_cpu_sensor_fds = None
+
+def _open_cpu_sensors(cpu_root=CPU_SYSFS_ROOT, thermal_root=THERMAL_SYSFS_ROOT):
+    """打开每个核心的频率、降频计数和温度传感器文件（虚拟机中通常不存在，返回空列表）"""
+    sensors = {'freq': [], 'core_throttle': [], 'package_throttle': [], 'thermal': []}
+    
+    try:
+        cpu_entries = sorted((entry for entry in os.listdir(cpu_root) if re.match(r'^cpu\d+$', entry)),
+                             key=lambda entry: int(entry[3:]))
+    except OSError:
+        cpu_entries = []
+    
+    seen_packages = set()
+    for entry in cpu_entries:
+        cpu_dir = os.path.join(cpu_root, entry)
+        try:
+            sensors['freq'].append(os.open(os.path.join(cpu_dir, 'cpufreq', 'scaling_cur_freq'), os.O_RDONLY))
+        except OSError:
+            pass
+        try:
+            sensors['core_throttle'].append(os.open(os.path.join(cpu_dir, 'thermal_throttle', 'core_throttle_count'), os.O_RDONLY))
+        except OSError:
+            pass
+        # 封装级降频计数在同一物理CPU的所有核心上相同，每个封装只读一次
+        try:
+            with open(os.path.join(cpu_dir, 'topology', 'physical_package_id'), 'r') as f:
+                package_id = f.read().strip()
+        except OSError:
+            package_id = entry
+        if package_id not in seen_packages:
+            try:
+                sensors['package_throttle'].append(os.open(os.path.join(cpu_dir, 'thermal_throttle', 'package_throttle_count'), os.O_RDONLY))
+                seen_packages.add(package_id)
+            except OSError:
+                pass
+    
+    try:
+        zones = sorted(entry for entry in os.listdir(thermal_root) if entry.startswith('thermal_zone'))
+    except OSError:
+        zones = []
+    for zone in zones:
+        zone_dir = os.path.join(thermal_root, zone)
+        try:
+            with open(os.path.join(zone_dir, 'type'), 'r') as f:
+                zone_type = f.read().strip() or zone
+        except OSError:
+            zone_type = zone
+        try:
+            sensors['thermal'].append((zone_type, zone, os.open(os.path.join(zone_dir, 'temp'), os.O_RDONLY)))
+        except OSError:
+            pass
+    
+    return sensors
+
+def _pread_int(fd):
+    """从常开的sysfs文件描述符读取整数"""
+    return int(os.pread(fd, 64, 0))
+
+def get_cpu_sensors():
+    """获取实时CPU频率、热降频次数和温度（仅Linux，虚拟机中通常返回None）"""
+    global _cpu_sensor_fds
+    if platform.system() != 'Linux':
+        return None
+    
+    if _cpu_sensor_fds is None:
+        _cpu_sensor_fds = _open_cpu_sensors()
+        if not any(_cpu_sensor_fds.values()):
+            print(f"[CPU] No cpufreq/thermal sensors exposed (virtual machine?), skipping")
+    if not any(_cpu_sensor_fds.values()):
+        return None
+    
+    result = {}
+    
+    frequencies = []
+    for fd in _cpu_sensor_fds['freq']:
+        try:
+            frequencies.append(_pread_int(fd) / 1000)  # kHz -> MHz
+        except (OSError, ValueError):
+            continue  # 核心被下线
+    if frequencies:
+        result['freq_mhz'] = round(sum(frequencies) / len(frequencies))
+        result['freq_min_mhz'] = round(min(frequencies))
+        result['freq_max_mhz'] = round(max(frequencies))
+        result['per_core_mhz'] = [round(freq) for freq in frequencies]
+    
+    throttle_counts = {}
+    for kind in ('core_throttle', 'package_throttle'):
+        total = 0
+        for fd in _cpu_sensor_fds[kind]:
+            try:
+                total += _pread_int(fd)
+            except (OSError, ValueError):
+                continue
+        if _cpu_sensor_fds[kind]:
+            throttle_counts[kind] = total
+    if throttle_counts:
+        rates = compute_counter_rates('cpu_throttle', throttle_counts)
+        for kind in throttle_counts:
+            result[f'{kind}s'] = round(rates.get(kind, 0.0), 2)  # 每秒降频事件数
+    
+    temperatures = {}
+    for zone_type, zone, fd in _cpu_sensor_fds['thermal']:
+        try:
+            temperature = _pread_int(fd) / 1000  # 毫摄氏度 -> 摄氏度
+        except (OSError, ValueError):
+            continue  # 部分传感器在休眠时返回错误
+        key = zone_type if zone_type not in temperatures else f'{zone_type}:{zone}'
+        temperatures[key] = round(temperature, 1)
+    if temperatures:
+        result['temperatures'] = temperatures
+    
+    return result or None
+
 def get_uptime():
     """获取系统运行时间（天）"""
     try:
@@ -1856,29 +2750,69 @@ def get_load_average():
     except:
         return 0.0
 
+def compute_counter_rates(namespace, counters, counter_bits=None, now=None):
+    """根据单调递增计数器批量计算每秒速率 - 支持计数器回绕与重置
+    
+    counter_bits: 固定位宽计数器的位数（如32），可以是整数或 {计数器名: 位数}
+    """
+    if now is None:
+        now = time.monotonic()
+    
+    with _counter_snapshots_lock:
+        previous = _counter_snapshots.get(namespace)
+        _counter_snapshots[namespace] = (now, dict(counters))
+    
+    # 第一次采样没有基准值
+    if previous is None:
+        return {}
+    
+    previous_time, previous_values = previous
+    time_delta = now - previous_time
+    if time_delta <= 0:
+        return {}
+    
+    rates = {}
+    for name, value in counters.items():
+        previous_value = previous_values.get(name)
+        if previous_value is None:
+            continue  # 新出现的计数器，下一轮再计算
+        
+        delta = value - previous_value
+        if delta < 0:
+            bits = counter_bits.get(name) if isinstance(counter_bits, dict) else counter_bits
+            if bits:
+                # 固定位宽计数器回绕（如32位的中断计数）
+                delta %= (1 << bits)
+            else:
+                # 计数器被重置（设备重建、模块重载等），从0开始计算
+                delta = value
+        rates[name] = delta / time_delta
+    
+    return rates
+
+def forget_counter_namespaces(prefix, active):
+    """清理已消失对象（网卡、磁盘等）的计数器快照，namespace为 prefix + 名称"""
+    with _counter_snapshots_lock:
+        for namespace in [key for key in _counter_snapshots if key.startswith(prefix)]:
+            if namespace[len(prefix):] not in active:
+                del _counter_snapshots[namespace]
+
 def get_network_speed():
     """获取网络速度（B/s）- 优化版本"""
-    global previous_net_io, last_net_time
     try:
-        current_net_io = psutil.net_io_counters()
-        current_time = time.time()
-        
-        if previous_net_io is None or last_net_time is None:
-            previous_net_io = current_net_io
-            last_net_time = current_time
-            return "0B", "0B"
-        
-        time_delta = current_time - last_net_time
-        if time_delta <= 0:
-            return "0B", "0B"
-            
-        # 计算速度 (bytes per second)
-        bytes_sent_speed = (current_net_io.bytes_sent - previous_net_io.bytes_sent) / time_delta
-        bytes_recv_speed = (current_net_io.bytes_recv - previous_net_io.bytes_recv) / time_delta
-        
-        # 更新记录
-        previous_net_io = current_net_io
-        last_net_time = current_time
+        # 按网卡分别计算速率再求和: 网卡消失（如Docker veth）时总和会下降，不能当作计数器重置
+        per_nic = psutil.net_io_counters(pernic=True)
+        now = time.monotonic()
+        bytes_sent_speed = 0
+        bytes_recv_speed = 0
+        for name, counters in per_nic.items():
+            rates = compute_counter_rates(f'net_io:{name}', {
+                'bytes_sent': counters.bytes_sent,
+                'bytes_recv': counters.bytes_recv
+            }, now=now)
+            bytes_sent_speed += rates.get('bytes_sent', 0)
+            bytes_recv_speed += rates.get('bytes_recv', 0)
+        forget_counter_namespaces('net_io:', per_nic)
         
         def format_bytes(bytes_val):
             if bytes_val < 0:
@@ -1897,51 +2831,688 @@ def get_network_speed():
         print(f"[Network] Error calculating network speed: {e}")
         return "0B", "0B"
 
-def format_bytes_total(bytes_val):
-    """格式化总流量"""
-    try:
-        if bytes_val < 0:
-            return "0B"
-        elif bytes_val < 1024 * 1024:
-            return f"{bytes_val/1024:.1f}K"
-        elif bytes_val < 1024 * 1024 * 1024:
-            return f"{bytes_val/(1024*1024):.1f}M"
-        elif bytes_val < 1024 * 1024 * 1024 * 1024:
-            return f"{bytes_val/(1024*1024*1024):.1f}G"
-        else:
-            return f"{bytes_val/(1024*1024*1024*1024):.1f}T"
-    except:
-        return "0B"
+# 需要按CPU统计的软中断类型
+SOFTIRQ_TYPES = ('NET_RX', 'NET_TX', 'TIMER')
 
-def get_public_ipv6():
-    """获取公网IPv6地址"""
+def _per_cpu_summary(rates):
+    """汇总每CPU速率：总量、最忙CPU和不均衡度（最大值/平均值，1为完全均衡）"""
+    total = sum(rates)
+    busiest = max(range(len(rates)), key=rates.__getitem__) if rates else 0
+    mean = total / len(rates) if rates else 0
+    return {
+        'per_cpu': [round(rate, 1) for rate in rates],
+        'total': round(total, 1),
+        'max_cpu': busiest,
+        'imbalance': round(rates[busiest] / mean, 2) if mean > 0 else 0.0
+    }
+
+def get_softirq_stats():
+    """获取每CPU的软中断速率（NET_RX/NET_TX/TIMER）及不均衡度，用于发现RSS/中断亲和性问题（仅Linux）"""
+    if platform.system() != 'Linux':
+        return None
     try:
-        # 尝试多个IPv6服务来获取公网IPv6
-        ipv6_services = [
-            'https://ipv6.icanhazip.com',
-            'https://v6.ident.me',
-            'https://ipv6.whatismyipaddress.com/api',
-            'https://6.ipw.cn'
-        ]
+        now = time.monotonic()
+        with open('/proc/softirqs', 'r') as f:
+            cpu_count = len(f.readline().split())
+            counters = {}
+            for line in f:
+                parts = line.split()
+                name = parts[0].rstrip(':') if parts else ''
+                if name in SOFTIRQ_TYPES:
+                    for cpu, value in enumerate(parts[1:cpu_count + 1]):
+                        counters[f'{name}:{cpu}'] = int(value)
         
-        for service in ipv6_services:
-            try:
-                response = requests.get(service, timeout=3)
-                if response.status_code == 200:
-                    ipv6 = response.text.strip()
-                    # 验证IPv6格式
-                    try:
-                        ipaddress.IPv6Address(ipv6)
-                        return ipv6
-                    except ipaddress.AddressValueError:
-                        continue
-            except:
+        # 每CPU计数为内核unsigned int，按32位回绕处理
+        rates = compute_counter_rates('softirqs', counters, counter_bits=32, now=now)
+        result = {}
+        for name in SOFTIRQ_TYPES:
+            per_cpu = [rates.get(f'{name}:{cpu}', 0.0) for cpu in range(cpu_count)]
+            result[name] = _per_cpu_summary(per_cpu)
+        
+        if TOP_INTERRUPT_COUNT > 0:
+            result['interrupts'] = _get_top_interrupts(now)
+        return result
+    except (FileNotFoundError, PermissionError, ValueError) as e:
+        print(f"[SoftIRQ] Error reading /proc/softirqs: {e}")
+        return None
+
+def _get_top_interrupts(now):
+    """获取 /proc/interrupts 中速率最高的中断行"""
+    with open('/proc/interrupts', 'r') as f:
+        cpu_count = len(f.readline().split())
+        counters = {}
+        descriptions = {}
+        for line in f:
+            parts = line.split()
+            if not parts:
                 continue
-                
-        # 如果所有服务都失败，尝试从本地网络接口获取IPv6
+            irq = parts[0].rstrip(':')
+            counts = 0
+            for cpu, value in enumerate(parts[1:cpu_count + 1]):
+                if not value.isdigit():
+                    break
+                counters[f'{irq}:{cpu}'] = int(value)
+                counts += 1
+            descriptions[irq] = ' '.join(parts[counts + 1:])
+    
+    # 每CPU计数为32位，先按CPU计算速率（处理回绕）再按中断求和
+    per_cpu_rates = compute_counter_rates('interrupts', counters, counter_bits=32, now=now)
+    rates = {}
+    for key, rate in per_cpu_rates.items():
+        irq = key.rpartition(':')[0]
+        rates[irq] = rates.get(irq, 0.0) + rate
+    top = heapq.nlargest(TOP_INTERRUPT_COUNT, rates.items(), key=lambda item: item[1])
+    return [{'irq': irq, 'name': descriptions[irq], 'rate': round(rate, 1)} for irq, rate in top]
+
+PSI_RESOURCES = ('cpu', 'memory', 'io')
+
+def parse_pressure(content):
+    """解析PSI文件内容: {'some': {'avg10': .., 'avg60': .., 'total': ..}, 'full': {...}}"""
+    pressure = {}
+    for line in content.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        values = {}
+        for field in parts[1:]:
+            key, _, value = field.partition('=')
+            values[key] = int(value) if key == 'total' else float(value)
+        pressure[parts[0]] = values
+    return pressure
+
+def get_pressure_stall_info():
+    """获取压力阻塞信息（PSI）：CPU/内存/IO的some/full平均值和阻塞时间占比（容器中使用cgroup级数据）"""
+    if platform.system() != 'Linux':
+        return None
+    
+    # 容器中优先使用cgroup v2的 *.pressure 文件
+    cgroup_paths = get_cgroup_paths()
+    if cgroup_paths.get('version') == 2:
+        sources = {resource: os.path.join(cgroup_paths['cpu'], f'{resource}.pressure') for resource in PSI_RESOURCES}
+    else:
+        sources = {resource: f'/proc/pressure/{resource}' for resource in PSI_RESOURCES}
+    
+    result = {}
+    for resource, path in sources.items():
         try:
-            for interface, addrs in psutil.net_if_addrs().items():
-                for addr in addrs:
+            with open(path, 'r') as f:
+                pressure = parse_pressure(f.read())
+        except (FileNotFoundError, PermissionError, OSError, ValueError):
+            continue  # 内核未启用PSI（需4.20+且psi=1）
+        
+        # total为累计阻塞时间（微秒），换算为采样周期内的阻塞时间占比
+        rates = compute_counter_rates(f'psi:{resource}', {
+            kind: values['total'] for kind, values in pressure.items() if 'total' in values
+        })
+        entry = {}
+        for kind, values in pressure.items():
+            entry[f'{kind}_avg10'] = values.get('avg10', 0.0)
+            entry[f'{kind}_avg60'] = values.get('avg60', 0.0)
+            entry[f'{kind}_stall'] = round(rates.get(kind, 0.0) / 1e4, 2)  # 微秒/秒 -> 百分比
+        result[resource] = entry
+    
+    return result or None
+
+# /proc/vmstat 计数器 -> 上报字段名
+VMSTAT_COUNTERS = {
+    'pgpgin': 'page_in_kb',       # 从磁盘换入的数据量（KiB）
+    'pgpgout': 'page_out_kb',     # 写出到磁盘的数据量（KiB）
+    'pswpin': 'swap_in',          # 从swap换入的页数
+    'pswpout': 'swap_out',        # 换出到swap的页数
+    'pgfault': 'page_faults',     # 缺页次数（含次缺页）
+    'pgmajfault': 'major_faults', # 主缺页次数（需要磁盘IO）
+    'pgscan_kswapd': 'scan_kswapd',    # kswapd后台回收扫描的页数
+    'pgscan_direct': 'scan_direct',    # 分配路径上直接回收扫描的页数
+    'pgsteal_kswapd': 'steal_kswapd',  # kswapd实际回收的页数
+    'pgsteal_direct': 'steal_direct'   # 直接回收实际回收的页数
+}
+
+# 按前缀累加的 /proc/vmstat 计数器（不同内核版本会按zone或anon/file拆分）
+VMSTAT_SUMMED_COUNTERS = {
+    'allocstall': 'alloc_stalls',     # 因直接回收而阻塞的内存分配次数
+    'workingset_refault': 'refaults'  # 被回收后又很快被访问的页数（工作集放不下的信号）
+}
+
+# /proc/stat 计数器 -> 上报字段名
+PROC_STAT_COUNTERS = {
+    'ctxt': 'context_switches',
+    'intr': 'interrupts',
+    'processes': 'forks'
+}
+
+def read_proc_counters(path, wanted):
+    """从 "名称 数值..." 格式的/proc文件中读取指定计数器（只取第一个数值）"""
+    counters = {}
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split(None, 2)
+            if len(parts) >= 2 and parts[0] in wanted:
+                counters[parts[0]] = int(parts[1])
+    return counters
+
+def get_vmstat_rates():
+    """获取内存压力相关速率：换页、交换、缺页、内存回收（每秒，仅Linux）"""
+    if platform.system() != 'Linux':
+        return None
+    try:
+        counters = {}
+        with open('/proc/vmstat', 'r') as f:
+            for line in f:
+                name, _, value = line.partition(' ')
+                if name in VMSTAT_COUNTERS:
+                    counters[name] = int(value)
+                    continue
+                for prefix in VMSTAT_SUMMED_COUNTERS:
+                    if name == prefix or name.startswith(prefix + '_'):
+                        counters[prefix] = counters.get(prefix, 0) + int(value)
+                        break
+        
+        rates = compute_counter_rates('vmstat', counters)
+        return {
+            field: round(rates.get(name, 0.0), 1)
+            for name, field in list(VMSTAT_COUNTERS.items()) + list(VMSTAT_SUMMED_COUNTERS.items())
+            if name in counters
+        }
+    except (FileNotFoundError, PermissionError, ValueError) as e:
+        print(f"[VMStat] Error reading /proc/vmstat: {e}")
+        return None
+
+def get_kernel_counter_rates():
+    """获取内核活动速率：上下文切换、中断、进程创建（每秒，仅Linux）"""
+    if platform.system() != 'Linux':
+        return None
+    try:
+        wanted = set(PROC_STAT_COUNTERS) | {'procs_running', 'procs_blocked'}
+        values = read_proc_counters('/proc/stat', wanted)
+        counters = {name: values[name] for name in PROC_STAT_COUNTERS if name in values}
+        rates = compute_counter_rates('proc_stat', counters)
+        result = {
+            field: round(rates.get(name, 0.0), 1)
+            for name, field in PROC_STAT_COUNTERS.items() if name in counters
+        }
+        # procs_running/procs_blocked 是瞬时值，直接上报
+        result['procs_running'] = values.get('procs_running', 0)
+        result['procs_blocked'] = values.get('procs_blocked', 0)
+        return result
+    except (FileNotFoundError, PermissionError, ValueError) as e:
+        print(f"[Kernel] Error reading /proc/stat: {e}")
+        return None
+
+def _read_proc_numbers(path):
+    """读取单行数字文件（如 /proc/sys/fs/file-nr），文件不存在时返回None"""
+    try:
+        with open(path, 'r') as f:
+            return [int(value) for value in f.read().split()]
+    except (FileNotFoundError, PermissionError):
+        return None
+
+def get_kernel_limits():
+    """获取内核资源饱和度：文件句柄、PID/线程、conntrack表的使用量与上限（仅Linux）"""
+    if platform.system() != 'Linux':
+        return None
+    
+    def usage(used, limit):
+        return round(used / limit * 100, 2) if limit else None
+    
+    try:
+        result = {}
+        
+        # file-nr: 已分配句柄数、空闲句柄数（恒为0）、上限
+        file_nr = _read_proc_numbers('/proc/sys/fs/file-nr')
+        if file_nr and len(file_nr) >= 3:
+            result['file_handles'] = file_nr[0] - file_nr[1]
+            result['file_max'] = file_nr[2]
+            result['file_percent'] = usage(result['file_handles'], file_nr[2])
+        
+        # /proc/loadavg 第4列 "运行中/总数" 的总数为内核调度实体（线程）数，每个线程占用一个PID
+        with open('/proc/loadavg', 'r') as f:
+            threads = int(f.read().split()[3].split('/')[1])
+        result['threads'] = threads
+        pid_max = _read_proc_numbers('/proc/sys/kernel/pid_max')
+        if pid_max:
+            result['pid_max'] = pid_max[0]
+            result['pid_percent'] = usage(threads, pid_max[0])
+        threads_max = _read_proc_numbers('/proc/sys/kernel/threads-max')
+        if threads_max:
+            result['threads_max'] = threads_max[0]
+            result['threads_percent'] = usage(threads, threads_max[0])
+        
+        # conntrack表（仅在加载nf_conntrack模块时存在）
+        conntrack_count = _read_proc_numbers('/proc/sys/net/netfilter/nf_conntrack_count')
+        conntrack_max = _read_proc_numbers('/proc/sys/net/netfilter/nf_conntrack_max')
+        if conntrack_count and conntrack_max:
+            result['conntrack'] = conntrack_count[0]
+            result['conntrack_max'] = conntrack_max[0]
+            result['conntrack_percent'] = usage(conntrack_count[0], conntrack_max[0])
+        
+        return result
+    except (OSError, ValueError, IndexError) as e:
+        print(f"[Kernel] Error reading kernel limits: {e}")
+        return None
+
+# /proc/net/snmp 与 /proc/net/netstat 计数器 -> 上报字段名
+NET_SNMP_COUNTERS = {
+    'Tcp.RetransSegs': 'tcp_retrans',
+    'Tcp.OutSegs': 'tcp_out_segs',
+    'Tcp.InErrs': 'tcp_in_errors',
+    'Tcp.OutRsts': 'tcp_out_resets',
+    'Tcp.AttemptFails': 'tcp_attempt_fails',
+    'TcpExt.ListenDrops': 'listen_drops',
+    'TcpExt.ListenOverflows': 'listen_overflows',
+    'TcpExt.TCPTimeouts': 'tcp_timeouts',
+    'Udp.InErrors': 'udp_in_errors',
+    'Udp.RcvbufErrors': 'udp_rcvbuf_errors',
+    'Udp.SndbufErrors': 'udp_sndbuf_errors'
+}
+
+# 不统计错误计数的网卡前缀（回环和容器veth）
+NET_HEALTH_SKIP_INTERFACES = ('lo', 'veth')
+
+def read_proc_net_snmp(path, wanted):
+    """读取 /proc/net/snmp 格式（表头行+数值行成对出现）的计数器，键为 "前缀.名称" """
+    counters = {}
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    for header, values in zip(lines[::2], lines[1::2]):
+        prefix, _, names = header.partition(':')
+        _, _, numbers = values.partition(':')
+        for name, value in zip(names.split(), numbers.split()):
+            key = f'{prefix}.{name}'
+            if key in wanted:
+                counters[key] = int(value)
+    return counters
+
+def get_network_health():
+    """获取TCP/UDP重传、丢包、错误速率和各网卡错误/丢包速率（每秒，仅Linux）"""
+    if platform.system() != 'Linux':
+        return None
+    try:
+        counters = {}
+        for path in ('/proc/net/snmp', '/proc/net/netstat'):
+            try:
+                counters.update(read_proc_net_snmp(path, NET_SNMP_COUNTERS))
+            except (FileNotFoundError, PermissionError):
+                continue
+        
+        rates = compute_counter_rates('net_snmp', counters)
+        result = {
+            field: round(rates.get(key, 0.0), 2)
+            for key, field in NET_SNMP_COUNTERS.items() if key in counters
+        }
+        # 重传率 = 重传报文 / 发送报文
+        out_segs = rates.get('Tcp.OutSegs', 0.0)
+        result['tcp_retrans_ratio'] = round(rates.get('Tcp.RetransSegs', 0.0) / out_segs * 100, 2) if out_segs > 0 else 0.0
+        
+        # /proc/net/dev: 接收 bytes packets errs drop ... 发送 bytes packets errs drop ...
+        now = time.monotonic()
+        interfaces = {}
+        seen = set()
+        with open('/proc/net/dev', 'r') as f:
+            for line in f:
+                name, sep, data = line.partition(':')
+                name = name.strip()
+                if not sep or name.startswith(NET_HEALTH_SKIP_INTERFACES):
+                    continue
+                fields = data.split()
+                if len(fields) < 12:
+                    continue
+                nic_rates = compute_counter_rates(f'net_dev:{name}', {
+                    'rx_errors': int(fields[2]),
+                    'rx_dropped': int(fields[3]),
+                    'tx_errors': int(fields[10]),
+                    'tx_dropped': int(fields[11])
+                }, now=now)
+                interfaces[name] = {key: round(value, 2) for key, value in nic_rates.items()}
+                seen.add(name)
+        forget_counter_namespaces('net_dev:', seen)
+        result['interfaces'] = interfaces
+        
+        return result
+    except (FileNotFoundError, PermissionError, ValueError) as e:
+        print(f"[NetHealth] Error reading network counters: {e}")
+        return None
+
+# TCP状态编号（include/net/tcp_states.h）
+TCP_STATES = {
+    1: 'ESTABLISHED', 2: 'SYN_SENT', 3: 'SYN_RECV', 4: 'FIN_WAIT1', 5: 'FIN_WAIT2', 6: 'TIME_WAIT',
+    7: 'CLOSE', 8: 'CLOSE_WAIT', 9: 'LAST_ACK', 10: 'LISTEN', 11: 'CLOSING', 12: 'SYN_RECV'
+}
+TCP_ESTABLISHED = 1
+TCP_LISTEN = 10
+TOP_LISTEN_PORTS = 10  # 上报连接数最多的监听端口数量
+
+# NETLINK_SOCK_DIAG 协议常量
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+# 这些错误说明内核或权限不支持sock_diag，之后不再尝试
+SOCK_DIAG_FATAL_ERRNOS = {errno.EPROTONOSUPPORT, errno.EACCES, errno.EPERM}
+
+_sock_diag_available = True
+_sock_diag_buffer = bytearray(256 * 1024)  # 复用的接收缓冲区
+
+def _new_socket_summary():
+    """创建空的套接字统计结构"""
+    return {'states': [0] * 13, 'listen': {}, 'established_ports': {}}
+
+def parse_sock_diag_messages(view, length, summary):
+    """解析一批inet_diag响应消息并累加到summary，收到NLMSG_DONE时返回True"""
+    states = summary['states']
+    listen = summary['listen']
+    established_ports = summary['established_ports']
+    offset = 0
+    while offset + 16 <= length:
+        msg_len, msg_type = struct.unpack_from('=IH', view, offset)
+        if msg_len < 16:
+            break
+        if msg_type == NLMSG_DONE:
+            return True
+        if msg_type == NLMSG_ERROR:
+            error_code = struct.unpack_from('=i', view, offset + 16)[0]
+            if error_code:
+                raise OSError(-error_code, os.strerror(-error_code))
+        elif msg_type == SOCK_DIAG_BY_FAMILY:
+            # inet_diag_msg: family, state, timer, retrans, sport(大端), ...
+            state = view[offset + 17]
+            sport = (view[offset + 20] << 8) | view[offset + 21]
+            if state < 13:
+                states[state] += 1
+            if state == TCP_LISTEN:
+                # 监听套接字的rqueue为当前全连接队列长度，wqueue为backlog上限
+                rqueue, wqueue = struct.unpack_from('=II', view, offset + 16 + 56)
+                queued, backlog = listen.get(sport, (0, 0))
+                listen[sport] = (queued + rqueue, max(backlog, wqueue))
+            elif state == TCP_ESTABLISHED:
+                established_ports[sport] = established_ports.get(sport, 0) + 1
+        offset += (msg_len + 3) & ~3
+    return False
+
+def _dump_sock_diag(summary):
+    """通过NETLINK_SOCK_DIAG批量导出IPv4/IPv6 TCP套接字"""
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_SOCK_DIAG) as sock:
+        sock.settimeout(5)
+        view = memoryview(_sock_diag_buffer)
+        for seq, family in enumerate((socket.AF_INET, socket.AF_INET6), 1):
+            # inet_diag_req_v2: family, protocol, ext, pad, states(全部), inet_diag_sockid(48字节全0)
+            request = struct.pack('=BBBBI', family, socket.IPPROTO_TCP, 0, 0, 0xFFFFFFFF) + bytes(48)
+            sock.send(struct.pack('=IHHII', 16 + len(request), SOCK_DIAG_BY_FAMILY,
+                                  NLM_F_REQUEST | NLM_F_DUMP, seq, 0) + request)
+            while True:
+                length = sock.recv_into(view)
+                if length == 0 or parse_sock_diag_messages(view, length, summary):
+                    break
+
+def parse_proc_net_tcp(lines, summary):
+    """解析 /proc/net/tcp[6] 的数据行（不含表头）并累加到summary"""
+    states = summary['states']
+    listen = summary['listen']
+    established_ports = summary['established_ports']
+    for line in lines:
+        # sl local_address rem_address st tx_queue:rx_queue ...
+        parts = line.split(None, 5)
+        if len(parts) < 5:
+            continue
+        state = int(parts[3], 16)
+        local = parts[1]
+        sport = int(local[local.rindex(b':') + 1:], 16)
+        if state < 13:
+            states[state] += 1
+        if state == TCP_LISTEN:
+            queued, backlog = listen.get(sport, (0, 0))
+            listen[sport] = (queued + int(parts[4].split(b':')[1], 16), backlog)  # backlog上限在此接口中不可见
+        elif state == TCP_ESTABLISHED:
+            established_ports[sport] = established_ports.get(sport, 0) + 1
+
+def get_socket_summary():
+    """获取TCP连接状态统计和各监听端口的连接数 - 优先使用netlink sock_diag，失败时回退到/proc/net/tcp*"""
+    global _sock_diag_available
+    if platform.system() != 'Linux':
+        return None
+    
+    summary = _new_socket_summary()
+    source = 'netlink'
+    use_proc = not _sock_diag_available
+    if _sock_diag_available:
+        try:
+            _dump_sock_diag(summary)
+        except AttributeError as e:
+            # 没有AF_NETLINK（非Linux构建的Python）
+            print(f"[Sockets] sock_diag unavailable, falling back to /proc/net/tcp: {e}")
+            _sock_diag_available = False
+            use_proc = True
+        except OSError as e:
+            if e.errno in SOCK_DIAG_FATAL_ERRNOS:
+                print(f"[Sockets] sock_diag unavailable, falling back to /proc/net/tcp: {e}")
+                _sock_diag_available = False
+            else:
+                # 超时等临时错误只在本轮回退，下一轮继续使用netlink
+                print(f"[Sockets] sock_diag dump failed, using /proc/net/tcp for this cycle: {e}")
+            use_proc = True
+        if use_proc:
+            summary = _new_socket_summary()
+    
+    if use_proc:
+        source = 'proc'
+        for path in ('/proc/net/tcp', '/proc/net/tcp6'):
+            try:
+                with open(path, 'rb') as f:
+                    next(f, None)  # 跳过表头
+                    parse_proc_net_tcp(f, summary)
+            except (FileNotFoundError, PermissionError):
+                continue
+    
+    states = {}
+    for state, count in enumerate(summary['states']):
+        if count:
+            name = TCP_STATES.get(state, str(state))
+            states[name] = states.get(name, 0) + count
+    
+    established_ports = summary['established_ports']
+    listen = [{
+        'port': port,
+        'established': established_ports.get(port, 0),
+        'accept_queue': queued,
+        'backlog': backlog
+    } for port, (queued, backlog) in summary['listen'].items()]
+    
+    return {
+        'source': source,
+        'total': sum(summary['states']),
+        'states': states,
+        'listen': heapq.nlargest(TOP_LISTEN_PORTS, listen, key=lambda item: item['established'])
+    }
+
+# 不统计IO的块设备前缀（loop、内存盘等虚拟设备）
+DISKSTATS_SKIP_PREFIXES = ('loop', 'ram', 'zram', 'fd', 'sr')
+# diskstats中的毫秒计数在内核中为unsigned int，会按32位回绕
+DISKSTATS_32BIT_COUNTERS = {'ms_reading': 32, 'ms_writing': 32, 'ms_io': 32}
+
+def get_disk_io_stats():
+    """获取每个块设备的读写吞吐、IOPS、平均等待时间和利用率（仅Linux）"""
+    if platform.system() != 'Linux':
+        return None
+    try:
+        # /sys/block 下只有整盘设备，分区不会出现在这里
+        try:
+            whole_disks = set(os.listdir('/sys/block'))
+        except OSError:
+            whole_disks = None
+        
+        now = time.monotonic()
+        devices = {}
+        seen = set()
+        with open('/proc/diskstats', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 14:
+                    continue
+                name = fields[2]
+                if name.startswith(DISKSTATS_SKIP_PREFIXES):
+                    continue
+                if whole_disks is not None and name not in whole_disks:
+                    continue
+                
+                counters = {
+                    'reads': int(fields[3]),
+                    'sectors_read': int(fields[5]),
+                    'ms_reading': int(fields[6]),
+                    'writes': int(fields[7]),
+                    'sectors_written': int(fields[9]),
+                    'ms_writing': int(fields[10]),
+                    'ms_io': int(fields[12])
+                }
+                seen.add(name)
+                rates = compute_counter_rates(f'diskstats:{name}', counters, counter_bits=DISKSTATS_32BIT_COUNTERS, now=now)
+                if not rates:
+                    continue
+                
+                ios = rates['reads'] + rates['writes']
+                await_ms = (rates['ms_reading'] + rates['ms_writing']) / ios if ios > 0 else 0.0
+                devices[name] = {
+                    'read_bytes': int(rates['sectors_read'] * 512),    # diskstats扇区固定为512字节
+                    'write_bytes': int(rates['sectors_written'] * 512),
+                    'read_iops': round(rates['reads'], 1),
+                    'write_iops': round(rates['writes'], 1),
+                    'await_ms': round(await_ms, 2),
+                    'util': round(min(rates['ms_io'] / 10, 100.0), 1)  # ms/s -> 百分比
+                }
+        
+        forget_counter_namespaces('diskstats:', seen)
+        return devices
+    except (FileNotFoundError, PermissionError, ValueError) as e:
+        print(f"[DiskIO] Error reading /proc/diskstats: {e}")
+        return None
+
+# 进程表缓存: pid -> {'start': 启动时间, 'ticks': utime+stime, 'name': 进程名, 'rss': 常驻内存页数}
+_process_table = {}
+_process_table_time = None
+
+def _read_process_stat(pid):
+    """读取 /proc/[pid]/stat，返回 (进程名, 启动时间, CPU时钟数, 常驻内存页数)"""
+    fd = os.open(f'/proc/{pid}/stat', os.O_RDONLY)
+    try:
+        raw = os.read(fd, 1024)
+    finally:
+        os.close(fd)
+    # 进程名可能包含空格和括号，以最后一个')'为分界
+    name_end = raw.rindex(b')')
+    name = raw[raw.index(b'(') + 1:name_end].decode('utf-8', 'replace')
+    fields = raw[name_end + 2:].split()
+    # fields[0]为state，utime/stime/starttime/rss分别是stat的第14/15/22/24列
+    return name, int(fields[19]), int(fields[11]) + int(fields[12]), int(fields[21])
+
+def get_top_processes(count=None):
+    """获取CPU和内存占用最高的进程 - 增量维护进程表，只计算CPU时间差"""
+    global _process_table_time
+    
+    if count is None:
+        count = TOP_PROCESS_COUNT
+    
+    try:
+        if platform.system() != 'Linux':
+            # 其他系统使用psutil（其内部会缓存Process对象用于计算cpu_percent）
+            processes = []
+            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info']):
+                info = proc.info
+                processes.append({
+                    'pid': info['pid'],
+                    'name': info['name'] or '',
+                    'cpu': round(info['cpu_percent'] or 0.0, 1),
+                    'rss': info['memory_info'].rss if info['memory_info'] else 0
+                })
+        else:
+            clock_ticks = os.sysconf('SC_CLK_TCK')
+            page_size = os.sysconf('SC_PAGE_SIZE')
+            now = time.monotonic()
+            elapsed = now - _process_table_time if _process_table_time else 0
+            _process_table_time = now
+            
+            processes = []
+            seen = set()
+            for entry in os.listdir('/proc'):
+                if not entry.isdigit():
+                    continue
+                pid = int(entry)
+                try:
+                    name, start, ticks, rss = _read_process_stat(pid)
+                except (OSError, ValueError, IndexError):
+                    continue  # 进程在读取过程中退出
+                seen.add(pid)
+                
+                cached = _process_table.get(pid)
+                if cached is not None and cached['start'] == start and elapsed > 0:
+                    # CPU使用率以单核为100%（与top一致）
+                    cpu = (ticks - cached['ticks']) / clock_ticks / elapsed * 100
+                    cached['ticks'] = ticks
+                    cached['rss'] = rss
+                else:
+                    # 新进程或PID被复用
+                    cpu = 0.0
+                    _process_table[pid] = {'start': start, 'ticks': ticks, 'name': name, 'rss': rss}
+                processes.append({'pid': pid, 'name': name, 'cpu': round(max(cpu, 0.0), 1), 'rss': rss * page_size})
+            
+            # 清理已退出的进程
+            for pid in [pid for pid in _process_table if pid not in seen]:
+                del _process_table[pid]
+        
+        return {
+            'count': len(processes),
+            'cpu': heapq.nlargest(count, processes, key=lambda proc: proc['cpu']),
+            'memory': heapq.nlargest(count, processes, key=lambda proc: proc['rss'])
+        }
+    except Exception as e:
+        print(f"[Process] Error collecting process table: {e}")
+        return None
+
+def format_bytes_total(bytes_val):
+    """格式化总流量"""
+    try:
+        if bytes_val < 0:
+            return "0B"
+        elif bytes_val < 1024 * 1024:
+            return f"{bytes_val/1024:.1f}K"
+        elif bytes_val < 1024 * 1024 * 1024:
+            return f"{bytes_val/(1024*1024):.1f}M"
+        elif bytes_val < 1024 * 1024 * 1024 * 1024:
+            return f"{bytes_val/(1024*1024*1024):.1f}G"
+        else:
+            return f"{bytes_val/(1024*1024*1024*1024):.1f}T"
+    except:
+        return "0B"
+
+def get_public_ipv6():
+    """获取公网IPv6地址"""
+    try:
+        # 尝试多个IPv6服务来获取公网IPv6
+        ipv6_services = [
+            'https://ipv6.icanhazip.com',
+            'https://v6.ident.me',
+            'https://ipv6.whatismyipaddress.com/api',
+            'https://6.ipw.cn'
+        ]
+        
+        for service in ipv6_services:
+            try:
+                response = requests.get(service, timeout=3)
+                if response.status_code == 200:
+                    ipv6 = response.text.strip()
+                    # 验证IPv6格式
+                    try:
+                        ipaddress.IPv6Address(ipv6)
+                        return ipv6
+                    except ipaddress.AddressValueError:
+                        continue
+            except:
+                continue
+                
+        # 如果所有服务都失败，尝试从本地网络接口获取IPv6
+        try:
+            for interface, addrs in psutil.net_if_addrs().items():
+                for addr in addrs:
                     if addr.family == socket.AF_INET6:
                         ipv6_addr = addr.address.split('%')[0]  # 移除zone id
                         try:
@@ -2349,90 +3920,498 @@ def perform_tcping(host, port):
             'error': str(e)
         }
 
-def collect_info():
-    """采集真实系统信息 - 优化版本"""
-    try:
-        print("[Data] Starting data collection...")
-        
-        # 基本信息
-        ip_info = get_ip_addresses()
-        status = '运行中'
-        
-        print(f"[Data] IP addresses: {ip_info['ip_display']}")
-        if ip_info['ipv6']:
-            print(f"[Data] IPv6 support detected: {ip_info['ipv6']}")
-        else:
-            print(f"[Data] IPv6 not available")
-        
-        # 系统运行时间
-        uptime = get_uptime()
-        print(f"[Data] Uptime: {uptime} days")
-        
-        # 系统负载
-        load = get_load_average()
-        print(f"[Data] Load average: {load}")
-        
-        # 网络速度
-        net_in, net_out = get_network_speed()
-        print(f"[Data] Network speed: ↓{net_in}/s ↑{net_out}/s")
-        
-        # 网络总流量
+def _default_report():
+    """上报数据的默认值（采集器尚未产生数据或采集失败时使用）"""
+    return {
+        'ip': 'ipv4:127.0.0.1',
+        'ipv4': '127.0.0.1',
+        'ipv6': None,
+        'status': '运行中',
+        'type': detect_system_type(),
+        'location': NODE_LOCATION,
+        'uptime': 0,
+        'load': 0.0,
+        'net_in': '0B',
+        'net_out': '0B',
+        'traffic_in': '0M',
+        'traffic_out': '0M',
+        'cpu': 0,
+        'ram': 0,
+        'rom': 0,
+        'detail': {
+            'memory': '0 MiB / 0 MiB',
+            'swap': '0 MiB / 0 MiB',
+            'disk': '0 GiB / 0 GiB',
+            'partitions_count': 0,
+            'cpu_info': 'Unknown CPU(1核/1线程)'
+        }
+    }
+
+# 采集器注册表: name -> {'func', 'interval', 'timeout', 'keys', 'last_run', 'value', 看门狗与熔断状态...}
+# 按注册顺序执行，上报数据由各采集器最近一次的结果组装
+_collectors = {}
+
+def register_collector(name, func, interval, timeout=10, keys=()):
+    """注册采集器：func返回 {上报字段: 值}，其中 'detail' 子字典会合并到 data['detail']
+    
+    keys声明该采集器负责的上报字段，返回值中未声明的字段会被丢弃
+    """
+    _collectors[name] = {
+        'func': func,
+        'interval': COLLECTOR_INTERVALS.get(name, interval),
+        'timeout': timeout,
+        'keys': frozenset(keys),
+        'undeclared': set(),      # 已告警过的未声明字段
+        'last_run': None,
+        'value': None,
+        'worker': None,           # 运行中的worker: (done, result, deadline)
+        'status': 'pending',      # ok / error / timeout / hung / open
+        'failures': 0,            # 连续失败次数
+        'open_until': 0,          # 熔断截止时间（monotonic）
+        'probe_delay': COLLECTOR_PROBE_BASE,
+        'last_success': None,
+        'duration': None,
+        'error': None
+    }
+
+def _start_collector_worker(name, func, deadline):
+    """在独立线程中执行采集器，挂起的采集器不会阻塞主循环"""
+    result = {}
+    done = threading.Event()
+    
+    def run():
+        started = time.monotonic()
         try:
-            net_io = psutil.net_io_counters()
-            traffic_in = format_bytes_total(net_io.bytes_recv)
-            traffic_out = format_bytes_total(net_io.bytes_sent)
-            print(f"[Data] Total traffic: ↓{traffic_in} ↑{traffic_out}")
+            result['value'] = func()
         except Exception as e:
-            print(f"[Data] Error getting network stats: {e}")
-            traffic_in = "0M"
-            traffic_out = "0M"
-        
-        # CPU使用率（优化版本）
-        cpu = get_cpu_usage()
-        print(f"[Data] CPU usage: {cpu}%")
-        
-        # 内存使用率（优化版本）
-        memory_info = get_memory_info()
-        ram = memory_info['percent']
-        print(f"[Data] Memory usage: {ram}% ({memory_info['detail']})")
-        
-        # 磁盘使用率（所有分区总和）
-        disk_info = get_all_disk_usage()
-        rom = int(disk_info['percent'])
-        print(f"[Data] Disk usage: {rom}% ({disk_info['detail']}) - {disk_info['partitions_count']} partitions")
-        
-        # CPU信息
-        cpu_info = get_cpu_info()
-        print(f"[Data] CPU info: {cpu_info['info_string']}")
-        
-        # 详细信息
-        detail = {
-            'memory': memory_info['detail'],
-            'swap': memory_info['swap_detail'],
-            'disk': disk_info['detail'],
-            'partitions_count': disk_info['partitions_count'],
-            'cpu_info': cpu_info['info_string']
+            result['error'] = e
+        finally:
+            result['duration'] = time.monotonic() - started
+            done.set()
+    
+    threading.Thread(target=run, name=f"collector:{name}", daemon=True).start()
+    return done, result, deadline
+
+def _record_collector_failure(name, collector, status, error, now):
+    """记录采集失败，连续失败达到阈值后熔断，按指数退避重新探测"""
+    collector['status'] = status
+    collector['error'] = error
+    collector['failures'] += 1
+    print(f"[Data] Collector '{name}' {status}: {error}")
+    if collector['failures'] >= COLLECTOR_FAILURE_THRESHOLD:
+        collector['open_until'] = now + collector['probe_delay']
+        print(f"[Data] Collector '{name}' disabled for {collector['probe_delay']}s after {collector['failures']} consecutive failures")
+        collector['probe_delay'] = min(collector['probe_delay'] * 2, COLLECTOR_PROBE_MAX)
+        if collector['value'] is not None:
+            # 熔断后不再上报过期数据，该采集器负责的字段回到默认值
+            print(f"[Data] Dropping stale values of collector '{name}': {', '.join(sorted(collector['value']))}")
+            collector['value'] = None
+
+def _harvest_collector(name, collector, now):
+    """处理worker的结果；超时的worker继续保留，返回前不会重新启动该采集器
+    
+    worker一直挂起时每轮都计为一次失败（熔断期间除外），使熔断器能打开并丢弃过期的值
+    """
+    done, result, deadline = collector['worker']
+    if not done.is_set():
+        if now >= deadline and collector['open_until'] <= now:
+            _record_collector_failure(name, collector, 'timeout', f"no result after {collector['timeout']}s", now)
+            collector['status'] = 'hung'
+        return
+    
+    collector['worker'] = None
+    collector['duration'] = result['duration']
+    if collector['status'] == 'hung':
+        collector['status'] = 'timeout'
+        return  # 超时后才返回的结果已过期，丢弃
+    if 'error' in result:
+        _record_collector_failure(name, collector, 'error', str(result['error']), now)
+        return
+    
+    value = result['value'] or {}
+    undeclared = set(value) - collector['keys'] - collector['undeclared']
+    if undeclared:
+        print(f"[Data] Collector '{name}' returned undeclared keys (ignored): {', '.join(sorted(undeclared))}")
+        collector['undeclared'] |= undeclared
+    collector['value'] = {key: item for key, item in value.items() if key in collector['keys']}
+    collector['status'] = 'ok'
+    collector['error'] = None
+    collector['failures'] = 0
+    collector['probe_delay'] = COLLECTOR_PROBE_BASE
+    collector['last_success'] = now
+
+def run_due_collectors(now=None, wait=None):
+    """启动所有到期的采集器，最多等待wait秒后收集结果，失败或超时时保留上一次的值（熔断后丢弃）"""
+    if now is None:
+        now = time.monotonic()
+    if wait is None:
+        wait = COLLECT_WAIT
+    
+    for name, collector in _collectors.items():
+        if collector['worker'] is not None:
+            continue  # 上一次运行尚未返回
+        if collector['open_until'] > now:
+            collector['status'] = 'open'
+            continue
+        if collector['last_run'] is not None and now - collector['last_run'] < collector['interval']:
+            continue
+        collector['last_run'] = now
+        collector['worker'] = _start_collector_worker(name, collector['func'], now + collector['timeout'])
+    
+    # 等待本轮worker完成，总等待时间不超过wait，未完成的留到下一轮收集
+    # 首次采集较慢的采集器（如IP、CPU型号）完成后由主循环立即补发一次上报（见first_results_ready）
+    wait_until = now + wait
+    for collector in _collectors.values():
+        if collector['worker'] is None:
+            continue
+        done, _, deadline = collector['worker']
+        remaining = min(wait_until, deadline) - time.monotonic()
+        if remaining > 0:
+            done.wait(remaining)
+    
+    now = time.monotonic()
+    for name, collector in _collectors.items():
+        if collector['worker'] is not None:
+            _harvest_collector(name, collector, now)
+
+def first_results_ready():
+    """是否有尚未产生过结果的采集器已经完成，此时应立即重新上报以替换占位值"""
+    return any(collector['status'] == 'pending' and collector['worker'] is not None and collector['worker'][0].is_set()
+               for collector in _collectors.values())
+
+def get_collector_health(now=None):
+    """各采集器的健康状态，用于区分采集卡死和主机离线"""
+    if now is None:
+        now = time.monotonic()
+    health = {}
+    for name, collector in _collectors.items():
+        health[name] = {
+            'status': collector['status'],
+            'age': round(now - collector['last_success'], 1) if collector['last_success'] is not None else None,
+            'duration_ms': round(collector['duration'] * 1000, 1) if collector['duration'] is not None else None,
+            'failures': collector['failures'],
+            'error': collector['error']
         }
+    return health
+
+def assemble_report():
+    """用各采集器最近一次的结果组装上报数据"""
+    data = _default_report()
+    for collector in _collectors.values():
+        value = collector['value']
+        if not value:
+            continue
+        for key, item in value.items():
+            if key in ('detail', 'custom'):
+                data.setdefault(key, {}).update(item)
+            else:
+                data[key] = item
+    data['collectors'] = get_collector_health()
+    return data
+
+def _collect_ip():
+    ip_info = get_ip_addresses()
+    print(f"[Data] IP addresses: {ip_info['ip_display']}")
+    if ip_info['ipv6']:
+        print(f"[Data] IPv6 support detected: {ip_info['ipv6']}")
+    else:
+        print(f"[Data] IPv6 not available")
+    return {
+        'ip': ip_info['ip_display'],  # 显示格式化的IP地址
+        'ipv4': ip_info['ipv4'],      # 原始IPv4地址
+        'ipv6': ip_info['ipv6']       # 原始IPv6地址
+    }
+
+def _collect_system():
+    # 系统类型和CPU型号基本不变，低频采集
+    cpu_info = get_cpu_info()
+    print(f"[Data] CPU info: {cpu_info['info_string']}")
+    return {
+        'type': detect_system_type(),
+        'location': NODE_LOCATION,
+        'detail': {'cpu_info': cpu_info['info_string']}
+    }
+
+def _collect_load():
+    uptime = get_uptime()
+    load = get_load_average()
+    print(f"[Data] Uptime: {uptime} days, load average: {load}")
+    return {'uptime': uptime, 'load': load}
+
+def _collect_network():
+    # 网络速度
+    net_in, net_out = get_network_speed()
+    print(f"[Data] Network speed: ↓{net_in}/s ↑{net_out}/s")
+    
+    # 网络总流量
+    try:
+        net_io = psutil.net_io_counters()
+        traffic_in = format_bytes_total(net_io.bytes_recv)
+        traffic_out = format_bytes_total(net_io.bytes_sent)
+        print(f"[Data] Total traffic: ↓{traffic_in} ↑{traffic_out}")
+    except Exception as e:
+        print(f"[Data] Error getting network stats: {e}")
+        traffic_in = "0M"
+        traffic_out = "0M"
+    return {'net_in': net_in, 'net_out': net_out, 'traffic_in': traffic_in, 'traffic_out': traffic_out}
+
+def _collect_cpu_memory():
+    # 容器环境下的cgroup限制（非容器环境为None）
+    cgroup = get_cgroup_stats()
+    if cgroup:
+        print(f"[Data] Cgroup: {cgroup['cpu_limit']} CPUs, throttled {cgroup['throttled_percent']}% of periods")
+    
+    # CPU使用率（优化版本）
+    cpu = get_cpu_usage(cgroup)
+    print(f"[Data] CPU usage: {cpu}%")
+    
+    # 内存使用率（优化版本）
+    memory_info = get_memory_info(cgroup)
+    ram = memory_info['percent']
+    print(f"[Data] Memory usage: {ram}% ({memory_info['detail']})")
+    if memory_info['breakdown']:
+        breakdown = memory_info['breakdown']
+        print(f"[Data] Memory breakdown: anon {breakdown.get('anon', 0)/(1024**2):.0f} MiB, cache {breakdown.get('cached', 0)/(1024**2):.0f} MiB, dirty {breakdown.get('dirty', 0)/(1024**2):.0f} MiB")
+    
+    return {
+        'cpu': cpu,
+        'ram': ram,
+        'cgroup': cgroup,
+        'memory_breakdown': memory_info['breakdown'],
+        'detail': {'memory': memory_info['detail'], 'swap': memory_info['swap_detail']}
+    }
+
+def _collect_cpu_sensors():
+    # 实时CPU频率、热降频和温度
+    cpu_sensors = get_cpu_sensors()
+    if cpu_sensors and 'freq_mhz' in cpu_sensors:
+        print(f"[Data] CPU frequency: {cpu_sensors['freq_mhz']} MHz ({cpu_sensors['freq_min_mhz']}-{cpu_sensors['freq_max_mhz']})")
+    return {'cpu_sensors': cpu_sensors}
+
+def _collect_disk():
+    # 磁盘使用率（所有分区总和）
+    disk_info = get_all_disk_usage()
+    rom = int(disk_info['percent'])
+    print(f"[Data] Disk usage: {rom}% ({disk_info['detail']}) - {disk_info['partitions_count']} partitions")
+    if disk_info['full_eta'] is not None:
+        print(f"[Data] Disk full ETA: {disk_info['full_eta'] / 3600:.1f} hours")
+    if disk_info['quarantined']:
+        print(f"[Data] Disk quarantined mounts: {', '.join(disk_info['quarantined'])}")
+    return {
+        'rom': rom,
+        'filesystems': [{
+            'device': fs['device'],
+            'fstype': fs['fstype'],
+            'mountpoints': fs['mountpoints'],
+            'total': fs['total'],
+            'used': fs['used'],
+            'percent': fs['percent'],
+            'inodes_used': fs['inodes_used'],
+            'inodes_total': fs['inodes_total'],
+            'inodes_percent': fs['inodes_percent'],
+            'fill_rate': fs['fill_rate'],
+            'full_eta': fs['full_eta']
+        } for fs in disk_info['filesystems']],
+        'disk_full_eta': disk_info['full_eta'],
+        'detail': {'disk': disk_info['detail'], 'partitions_count': disk_info['partitions_count']}
+    }
+
+def _collect_disk_io():
+    # 磁盘IO（每个块设备）
+    disk_io = get_disk_io_stats()
+    if disk_io:
+        busiest = max(disk_io, key=lambda name: disk_io[name]['util'])
+        print(f"[Data] Disk IO: {len(disk_io)} devices, busiest {busiest} {disk_io[busiest]['util']}% util, await {disk_io[busiest]['await_ms']}ms")
+    return {'disk_io': disk_io}
+
+def _collect_numa():
+    # NUMA节点（仅多节点系统）
+    numa = get_numa_stats()
+    if numa:
+        print(f"[Data] NUMA: " + ', '.join(f"node{node['node']} mem {node['mem_percent']}% cpu {node['cpu']}%" for node in numa))
+    return {'numa': numa}
+
+def _collect_kernel_limits():
+    # 内核资源饱和度
+    kernel_limits = get_kernel_limits()
+    if kernel_limits:
+        print(f"[Data] Kernel limits: fd {kernel_limits.get('file_percent')}%, pid {kernel_limits.get('pid_percent')}%, conntrack {kernel_limits.get('conntrack_percent', 'N/A')}%")
+    return {'kernel_limits': kernel_limits}
+
+def _collect_net_health():
+    # 网络质量：重传、丢包、错误速率
+    net_health = get_network_health()
+    if net_health:
+        print(f"[Data] Network health: retrans {net_health.get('tcp_retrans', 0)}/s ({net_health['tcp_retrans_ratio']}%), listen drops {net_health.get('listen_drops', 0)}/s")
+    return {'net_health': net_health}
+
+def _collect_sockets():
+    # TCP连接状态统计
+    sockets = get_socket_summary()
+    if sockets:
+        print(f"[Data] TCP sockets: {sockets['total']} total, {sockets['states'].get('ESTABLISHED', 0)} established, {sockets['states'].get('TIME_WAIT', 0)} time-wait ({sockets['source']})")
+    return {'sockets': sockets}
+
+def _collect_containers():
+    # 宿主机上各容器的资源占用
+    containers = get_container_stats()
+    if containers:
+        print(f"[Data] Containers: {len(containers)} running, busiest {containers[0]['id']} {containers[0]['cpu']}% CPU")
+    return {'containers': containers or None}
+
+def _collect_top_processes():
+    # 资源占用最高的进程
+    top_processes = get_top_processes()
+    if top_processes and top_processes['cpu']:
+        top_cpu = top_processes['cpu'][0]
+        print(f"[Data] Top process: {top_cpu['name']} (pid {top_cpu['pid']}) {top_cpu['cpu']}% CPU, {top_processes['count']} processes")
+    return {'top_processes': top_processes}
+
+def _collect_softirqs():
+    # 每CPU软中断分布
+    softirqs = get_softirq_stats()
+    if softirqs:
+        print(f"[Data] NET_RX softirq: {softirqs['NET_RX']['total']}/s, imbalance {softirqs['NET_RX']['imbalance']} (busiest CPU{softirqs['NET_RX']['max_cpu']})")
+    return {'softirqs': softirqs}
+
+def _collect_pressure():
+    # 压力阻塞信息（PSI）
+    pressure = get_pressure_stall_info()
+    if pressure:
+        print(f"[Data] PSI some avg10: " + ', '.join(f"{resource} {values.get('some_avg10', 0.0)}%" for resource, values in pressure.items()))
+    return {'pressure': pressure}
+
+def _collect_vmstat():
+    # 内存压力与内核活动速率（仅Linux）
+    vmstat = get_vmstat_rates()
+    kernel_stats = get_kernel_counter_rates()
+    if vmstat:
+        print(f"[Data] VMStat: swap in/out {vmstat.get('swap_in', 0)}/{vmstat.get('swap_out', 0)} pages/s, major faults {vmstat.get('major_faults', 0)}/s")
+    return {'vmstat': vmstat, 'kernel': kernel_stats}
+
+# 内置采集器: 变化快且廉价的指标高频采集，静态或昂贵的指标低频采集
+register_collector('ip', _collect_ip, interval=300, timeout=30, keys=('ip', 'ipv4', 'ipv6'))
+register_collector('system', _collect_system, interval=600, timeout=30, keys=('type', 'location', 'detail'))
+register_collector('load', _collect_load, interval=5, timeout=2, keys=('uptime', 'load'))
+register_collector('network', _collect_network, interval=5, timeout=2, keys=('net_in', 'net_out', 'traffic_in', 'traffic_out'))
+register_collector('cpu_memory', _collect_cpu_memory, interval=5, timeout=3, keys=('cpu', 'ram', 'cgroup', 'memory_breakdown', 'detail'))
+register_collector('cpu_sensors', _collect_cpu_sensors, interval=5, timeout=2, keys=('cpu_sensors',))
+register_collector('disk', _collect_disk, interval=15, timeout=5, keys=('rom', 'filesystems', 'disk_full_eta', 'detail'))
+register_collector('disk_io', _collect_disk_io, interval=5, timeout=2, keys=('disk_io',))
+register_collector('numa', _collect_numa, interval=10, timeout=2, keys=('numa',))
+register_collector('kernel_limits', _collect_kernel_limits, interval=30, timeout=2, keys=('kernel_limits',))
+register_collector('net_health', _collect_net_health, interval=5, timeout=2, keys=('net_health',))
+register_collector('sockets', _collect_sockets, interval=15, timeout=10, keys=('sockets',))
+register_collector('containers', _collect_containers, interval=10, timeout=5, keys=('containers',))
+register_collector('top_processes', _collect_top_processes, interval=10, timeout=5, keys=('top_processes',))
+register_collector('softirqs', _collect_softirqs, interval=5, timeout=2, keys=('softirqs',))
+register_collector('pressure', _collect_pressure, interval=5, timeout=2, keys=('pressure',))
+register_collector('vmstat', _collect_vmstat, interval=5, timeout=2, keys=('vmstat', 'kernel'))
+
+# 自定义(exec)采集器: 常驻worker进程，通过stdin/stdout按行交换JSON
+#   请求: {"id": 1}
+#   响应: {"id": 1, "metrics": {...}} 或 {"id": 1, "error": "..."}
+# worker读到stdin EOF时应退出；非JSON行和id不匹配的响应会被忽略
+_exec_workers = {}
+
+def _start_exec_worker(name, command):
+    """启动常驻worker进程"""
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+    print(f"[Exec] Started worker '{name}' (pid {proc.pid})")
+    worker = {'proc': proc, 'buffer': b'', 'seq': 0}
+    _exec_workers[name] = worker
+    return worker
+
+def _stop_exec_worker(name):
+    """结束worker进程，下一次采集时会重新启动"""
+    worker = _exec_workers.pop(name, None)
+    if worker is None:
+        return
+    proc = worker['proc']
+    try:
+        proc.stdin.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait(timeout=1)
+    except Exception as e:
+        print(f"[Exec] Error stopping worker '{name}': {e}")
+
+def stop_exec_workers():
+    for name in list(_exec_workers):
+        _stop_exec_worker(name)
+
+def _read_exec_line(worker, deadline):
+    """从worker的stdout读取一行，超过deadline抛出TimeoutError"""
+    fd = worker['proc'].stdout.fileno()
+    while b'\n' not in worker['buffer']:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('no response from worker')
+        if platform.system() != 'Windows':
+            # Windows的select不支持管道，只能阻塞读取，由采集器看门狗兜底
+            import select
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            raise RuntimeError(f"worker exited with code {worker['proc'].wait()}")
+        worker['buffer'] += chunk
+    line, worker['buffer'] = worker['buffer'].split(b'\n', 1)
+    return line
+
+def collect_exec(name, command, timeout):
+    """向常驻worker请求一次采样，worker崩溃或无响应时重启"""
+    worker = _exec_workers.get(name)
+    if worker is not None and worker['proc'].poll() is not None:
+        print(f"[Exec] Worker '{name}' exited with code {worker['proc'].returncode}, restarting")
+        _stop_exec_worker(name)
+        worker = None
+    if worker is None:
+        worker = _start_exec_worker(name, command)
+    
+    worker['seq'] += 1
+    deadline = time.monotonic() + timeout
+    try:
+        worker['proc'].stdin.write(json.dumps({'id': worker['seq']}).encode() + b'\n')
+        while True:
+            line = _read_exec_line(worker, deadline)
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(response, dict) and response.get('id') == worker['seq']:
+                break
+    except Exception:
+        _stop_exec_worker(name)
+        raise
+    
+    if response.get('error'):
+        raise RuntimeError(response['error'])
+    return response.get('metrics')
+
+def _register_exec_collectors():
+    for config in EXEC_COLLECTORS:
+        name = config['name']
+        timeout = config.get('timeout', 5)
         
-        data = {
-            'ip': ip_info['ip_display'],  # 显示格式化的IP地址
-            'ipv4': ip_info['ipv4'],      # 原始IPv4地址
-            'ipv6': ip_info['ipv6'],      # 原始IPv6地址
-            'status': status,
-            'type': detect_system_type(),
-            'location': NODE_LOCATION,
-            'uptime': uptime,
-            'load': load,
-            'net_in': net_in,
-            'net_out': net_out,
-            'traffic_in': traffic_in,
-            'traffic_out': traffic_out,
-            'cpu': cpu,
-            'ram': ram,
-            'rom': rom,
-            'detail': detail
-        }
+        def collect(name=name, command=config['command'], timeout=timeout):
+            return {'custom': {name: collect_exec(name, command, timeout)}}
         
+        # 看门狗的超时略长于worker超时，让worker超时时能先被结束并重启
+        register_collector(f"exec:{name}", collect, interval=config.get('interval', 5),
+                           timeout=timeout + 1, keys=('custom',))
+
+_register_exec_collectors()
+
+def collect_info():
+    """采集真实系统信息 - 按各采集器的间隔执行到期的采集，再用缓存结果组装上报数据"""
+    global _latest_report
+    try:
+        print("[Data] Starting data collection...")
+        run_due_collectors()
+        data = assemble_report()
+        _latest_report = (time.time(), data)
         print(f"[Data] Collection completed successfully")
         return data
         
@@ -2442,134 +4421,582 @@ def collect_info():
         traceback.print_exc()
         
         # 返回默认值，确保程序不会崩溃
-        return {
-            'ip': 'ipv4:127.0.0.1',
-            'ipv4': '127.0.0.1',
-            'ipv6': None,
-            'status': '异常',
-            'type': detect_system_type(),
-            'location': NODE_LOCATION,
-            'uptime': 0,
-            'load': 0.0,
-            'net_in': '0B',
-            'net_out': '0B',
-            'traffic_in': '0M',
-            'traffic_out': '0M',
-            'cpu': 0,
-            'ram': 0,
-            'rom': 0,
-            'detail': {
-                'memory': '0 MiB / 0 MiB',
-                'swap': '0 MiB / 0 MiB',
-                'disk': '0 GiB / 0 GiB',
-                'partitions_count': 0,
-                'cpu_info': 'Unknown CPU(1核/1线程)'
-            }
+        data = _default_report()
+        data['status'] = '异常'
+        return data
+
+# 本地OpenMetrics导出: 最近一次采样 (wall_time, data)，抓取时只渲染缓存，不触发采集
+_latest_report = None
+_metrics_server = None
+_metrics_rendered = None  # (report, body, gzip_body)
+
+METRICS_PREFIX = 'bserver'
+# 键为动态名称（设备、资源等）的字典 -> 标签名
+METRICS_LABEL_KEYS = {
+    'disk_io': 'device',
+    'interfaces': 'interface',
+    'pressure': 'resource',
+    'softirqs': 'type',
+    'states': 'state',
+    'collectors': 'collector',
+    'custom': 'collector'
+}
+# 对象/数值列表 -> 标签名（对象列表取该字段作为标签值，数值列表取下标）
+METRICS_LIST_LABELS = {
+    'filesystems': 'device',
+    'containers': 'id',
+    'numa': 'node',
+    'listen': 'port',
+    'per_cpu': 'cpu'
+}
+METRICS_SKIP_KEYS = ('top_processes', 'detail')  # 高基数或纯文本字段
+
+def _flatten_metrics(name, key, value, labels, families):
+    """把上报数据展开为 {指标名: [(labels, value)]}，字符串和None忽略"""
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        families.setdefault(re.sub(r'[^a-zA-Z0-9_]', '_', name), []).append((labels, value))
+    elif isinstance(value, dict):
+        label = METRICS_LABEL_KEYS.get(key)
+        for child_key, child in value.items():
+            if label:
+                _flatten_metrics(name, child_key, child, labels + ((label, str(child_key)),), families)
+            elif child_key not in METRICS_SKIP_KEYS:
+                _flatten_metrics(f"{name}_{child_key}", child_key, child, labels, families)
+    elif isinstance(value, list):
+        label = METRICS_LIST_LABELS.get(key)
+        if label is None:
+            return
+        for index, item in enumerate(value):
+            if isinstance(item, dict):
+                item = dict(item)
+                label_value = item.pop(label, index)
+                _flatten_metrics(name, None, item, labels + ((label, str(label_value)),), families)
+            else:
+                _flatten_metrics(name, None, item, labels + ((label, str(index)),), families)
+
+def flatten_report(data, prefix=''):
+    """上报数据中的数值字段 -> {指标名: [(labels, value)]}"""
+    families = {}
+    for key, value in data.items():
+        if key not in METRICS_SKIP_KEYS:
+            _flatten_metrics(f"{prefix}{key}", key, value, (), families)
+    return families
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def render_openmetrics(sample_time, data):
+    """按OpenMetrics文本格式渲染一次采样，除节点信息外所有指标均为gauge"""
+    families = {f"{METRICS_PREFIX}_sample_timestamp_seconds": [((), round(sample_time, 3))]}
+    families.update(flatten_report(data, f"{METRICS_PREFIX}_"))
+    
+    info = (('node', NODE_NAME), ('type', str(data.get('type'))), ('location', str(data.get('location'))),
+            ('version', CLIENT_VERSION), ('ipv4', str(data.get('ipv4'))))
+    lines = [f"# TYPE {METRICS_PREFIX}_node info", f"{METRICS_PREFIX}_node_info{_format_labels(info)} 1"]
+    for name, samples in families.items():
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    lines.append("# EOF")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """只提供 GET /metrics，内容来自最近一次采样的缓存"""
+    
+    def do_GET(self):
+        global _metrics_rendered
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        report = _latest_report
+        if report is None:
+            self.send_error(503, 'No sample collected yet')
+            return
+        
+        # 同一次采样只渲染、压缩一次
+        rendered = _metrics_rendered
+        if rendered is None or rendered[0] is not report:
+            body = render_openmetrics(*report)
+            rendered = _metrics_rendered = (report, body, gzip.compress(body))
+        
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = rendered[2] if use_gzip else rendered[1]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass  # 避免每次抓取都打印日志
+
+def start_metrics_server():
+    """在后台线程中启动本地 /metrics 端点（METRICS_LISTEN 为 None 时不启动）"""
+    global _metrics_server
+    if METRICS_LISTEN is None or _metrics_server is not None:
+        return
+    try:
+        _metrics_server = http.server.ThreadingHTTPServer(METRICS_LISTEN, MetricsHandler)
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[Metrics] Serving OpenMetrics on http://{METRICS_LISTEN[0]}:{METRICS_LISTEN[1]}/metrics")
+    except Exception as e:
+        print(f"[Metrics] Failed to start metrics endpoint on {METRICS_LISTEN}: {e}")
+        _metrics_server = None
+
+# 输出目标: 每个sink有独立的有界队列和发送线程，慢的sink不会阻塞其他sink
+# sink -> {'name', 'queue', 'write', 'dropped'}
+_output_sinks = []
+
+def _sanitize_statsd(name):
+    return re.sub(r'[^a-zA-Z0-9_\-]', '_', name)
+
+def _escape_influx(value):
+    return re.sub(r'([,= ])', r'\\\1', value)
+
+def _send_udp_lines(sock, address, lines, max_packet=1400):
+    """按行打包发送UDP，单个包不超过max_packet字节"""
+    packet = b''
+    for line in lines:
+        line = line.encode('utf-8')
+        if packet and len(packet) + len(line) + 1 > max_packet:
+            sock.sendto(packet, address)
+            packet = b''
+        packet = packet + b'\n' + line if packet else line
+    if packet:
+        sock.sendto(packet, address)
+
+def _append_lines(config, lines):
+    """追加写入文件，超过max_bytes时轮转为 path.1 ... path.N"""
+    path = config['path']
+    max_bytes = config.get('max_bytes', 10 * 1024 * 1024)
+    backups = config.get('backups', 3)
+    try:
+        if max_bytes and os.path.getsize(path) >= max_bytes:
+            for index in range(backups - 1, 0, -1):
+                if os.path.exists(f"{path}.{index}"):
+                    os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+            if backups > 0:
+                os.replace(path, f"{path}.1")
+            else:
+                os.remove(path)
+    except FileNotFoundError:
+        pass
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def _make_socketio_writer(config):
+    # fanout模式下每个服务端一个sink（config['server']），failover模式下发送到当前服务端
+    def write(sample):
+        send_data(sample[1], config.get('server'))
+    return write
+
+def _make_statsd_writer(config):
+    """StatsD gauge: <prefix>.<node>.<metric>[.<label值>...]:<value>|g（负值发送为 :0|g 加 :<value>|g）"""
+    address = (config.get('host', '127.0.0.1'), config.get('port', 8125))
+    prefix = f"{config.get('prefix', METRICS_PREFIX)}.{_sanitize_statsd(NODE_NAME)}"
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    
+    def write(sample):
+        lines = []
+        for name, samples in flatten_report(sample[1]).items():
+            for labels, value in samples:
+                path = '.'.join([prefix, name] + [_sanitize_statsd(label_value) for _, label_value in labels])
+                if value < 0:
+                    # StatsD中带'-'的gauge是相对减量，先置0再减，两行放在同一个包中保证顺序
+                    lines.append(f"{path}:0|g\n{path}:{value}|g")
+                else:
+                    lines.append(f"{path}:{value}|g")
+        _send_udp_lines(sock, address, lines)
+    return write
+
+def _make_influx_writer(config):
+    """InfluxDB行协议: 同一组标签的指标合并为一行，数值统一写为float避免字段类型冲突"""
+    measurement = _escape_influx(config.get('measurement', METRICS_PREFIX))
+    node_tag = f"node={_escape_influx(NODE_NAME)}"
+    sock = None
+    if 'path' not in config:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        address = (config.get('host', '127.0.0.1'), config.get('port', 8089))
+    
+    def write(sample):
+        timestamp = int(sample[0] * 1e9)
+        rows = {}
+        for name, samples in flatten_report(sample[1]).items():
+            for labels, value in samples:
+                rows.setdefault(labels, []).append(f"{_escape_influx(name)}={float(value)}")
+        lines = []
+        for labels, fields in rows.items():
+            tags = ''.join(f",{_escape_influx(label)}={_escape_influx(label_value)}" for label, label_value in labels if label_value)
+            lines.append(f"{measurement},{node_tag}{tags} {','.join(fields)} {timestamp}")
+        if sock is not None:
+            _send_udp_lines(sock, address, lines)
+        else:
+            _append_lines(config, lines)
+    return write
+
+def _make_jsonl_writer(config):
+    def write(sample):
+        _append_lines(config, [json.dumps({
+            'timestamp': int(sample[0] * 1000),
+            'node_name': NODE_NAME,
+            'data': sample[1]
+        }, ensure_ascii=False)])
+    return write
+
+SINK_TYPES = {
+    'socketio': _make_socketio_writer,
+    'statsd': _make_statsd_writer,
+    'influx': _make_influx_writer,
+    'jsonl': _make_jsonl_writer
+}
+
+def _run_sink(sink):
+    while True:
+        sample = sink['queue'].get()
+        try:
+            sink['write'](sample)
+        except Exception as e:
+            print(f"[Sink] ❌ {sink['name']} write failed: {e}")
+
+def start_output_sinks():
+    """按 OUTPUT_SINKS 配置启动各输出目标的发送线程"""
+    import queue
+    configs = []
+    for config in OUTPUT_SINKS:
+        if config.get('type') == 'socketio' and SERVER_MODE == 'fanout':
+            configs.extend({**config, 'name': f"socketio:{conn['url']}", 'server': conn} for conn in _servers)
+        else:
+            configs.append(config)
+    
+    for config in configs:
+        sink_type = config.get('type')
+        if sink_type not in SINK_TYPES:
+            print(f"[Sink] ⚠️  Unknown sink type: {sink_type}")
+            continue
+        try:
+            write = SINK_TYPES[sink_type](config)
+        except Exception as e:
+            print(f"[Sink] ❌ Failed to create {sink_type} sink: {e}")
+            continue
+        # Socket.IO只需要最新的一次采样，其他sink缓冲一定数量以应对短暂阻塞
+        size = config.get('queue_size', 1 if sink_type == 'socketio' else SINK_QUEUE_SIZE)
+        sink = {
+            'name': config.get('name', sink_type),
+            'type': sink_type,
+            'queue': queue.Queue(maxsize=size),
+            'write': write,
+            'server': config.get('server'),
+            'dropped': 0
         }
+        _output_sinks.append(sink)
+        threading.Thread(target=_run_sink, args=(sink,), name=f"sink:{sink['name']}", daemon=True).start()
+        print(f"[Sink] Output sink started: {sink['name']} ({sink_type})")
+
+def publish_sample(data):
+    """把一次采样分发给所有sink，队列已满时丢弃该sink最旧的一条"""
+    import queue
+    sample = (time.time(), data)
+    for sink in _output_sinks:
+        if sink['type'] == 'socketio' and not _is_registered(sink['server'] or get_active_connection()):
+            continue  # 未注册时服务端不接收数据
+        while True:
+            try:
+                sink['queue'].put_nowait(sample)
+                break
+            except queue.Full:
+                try:
+                    sink['queue'].get_nowait()
+                    sink['dropped'] += 1
+                except queue.Empty:
+                    pass
 
-# Socket.IO 事件处理器
-@sio.event
-def connect():
-    global _connection_stable, _registration_confirmed
-    print(f"[Socket] ✅ Connected to server: {SERVER_URL}")
-    _connection_stable = True
-    _registration_confirmed = False  # 重置注册状态，等待注册确认
-    # 🔧 连接成功后立即注册，避免延迟
-    print(f"[Socket] 📝 Sending registration request for node: {NODE_NAME}")
-    try:
-        sio.emit('register', {'node_name': NODE_NAME})
-        print(f"[Socket] 📤 Registration request sent")
-    except Exception as reg_error:
-        print(f"[Socket] ❌ Failed to send registration: {reg_error}")
-
-@sio.event
-def disconnect():
-    global _connection_stable, _registration_confirmed
-    print(f"[Socket] ❌ Disconnected from server - will attempt reconnection")
-    _connection_stable = False
-    _registration_confirmed = False
-
-@sio.event
-def connect_error(data):
-    global _connection_stable, _registration_confirmed
-    print(f"[Socket] ❌ Connection error: {data}")
-    _connection_stable = False
-    _registration_confirmed = False
-
-@sio.event
-def reconnect():
-    global _connection_stable, _registration_confirmed
-    print(f"[Socket] 🔄 Reconnected to server successfully")
-    _connection_stable = True
-    _registration_confirmed = False  # 重置注册状态
-    # 重连后重新注册
-    print(f"[Socket] 📝 Sending re-registration request for node: {NODE_NAME}")
-    try:
-        sio.emit('register', {'node_name': NODE_NAME})
-        print(f"[Socket] 📤 Re-registration request sent")
-    except Exception as reg_error:
-        print(f"[Socket] ❌ Failed to send re-registration: {reg_error}")
-
-@sio.event  
-def reconnect_error(data):
-    global _connection_stable, _registration_confirmed
-    print(f"[Socket] ❌ Reconnection error: {data}")
-    _connection_stable = False
-    _registration_confirmed = False
-
-@sio.event
-def connection_replaced(data):
-    print(f"[Socket] ⚠️  Connection replaced by new instance: {data.get('message', 'Unknown reason')}")
-    print(f"[Socket] New socket ID: {data.get('new_socket_id', 'Unknown')}") 
-    print(f"[Socket] This connection will be closed, allowing new connection to take over")
-    # 不需要做任何特殊处理，让Socket.IO自然断开并重连
-
-@sio.event
-def registration_success(data):
-    global _registration_confirmed
-    socket_id = data.get('socket_id', 'Unknown')
-    print(f"[Socket] ✅ Node '{NODE_NAME}' registered successfully (socket: {socket_id})")
-    _registration_confirmed = True  # 🔧 确认注册成功
-    print(f"[Socket] 🎉 Registration confirmed, client is now fully operational")
-
-@sio.event
-def registration_failed(data):
-    global _registration_confirmed
-    error_msg = data.get('error', 'Unknown error')
-    print(f"[Socket] ❌ Registration failed: {error_msg}")
-    _registration_confirmed = False
-    print(f"[Socket] 🔄 Will retry registration...")
-
-@sio.event
-def error(data):
-    print(f"[Socket] ❌ Socket error: {data}")
+def needs_sampling():
+    """是否有输出需要本轮采样（只有Socket.IO输出且未注册时跳过采样）"""
+    if _metrics_server is not None:
+        return True
+    for sink in _output_sinks:
+        if sink['type'] != 'socketio' or _is_registered(sink['server'] or get_active_connection()):
+            return True
+    return False
+
+# 服务端地址解析: 缓存DNS结果，双栈时按Happy Eyeballs把先连通的地址排在最前
+# 通过包装socket.getaddrinfo生效，只影响服务端域名，保留Host头和TLS SNI
+_original_getaddrinfo = socket.getaddrinfo
+_dns_cache = {}  # (host, port) -> (expires_monotonic, getaddrinfo结果)
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    try:
+        entry = _dns_cache.get((host, int(port)))
+    except (TypeError, ValueError):
+        entry = None
+    if entry is not None and entry[0] > time.monotonic():
+        infos = [info for info in entry[1]
+                 if (not family or info[0] == family) and (not type or info[1] == type)]
+        if infos:
+            return infos
+    return _original_getaddrinfo(host, port, family, type, proto, flags)
+
+socket.getaddrinfo = _cached_getaddrinfo
+
+def _server_host_port(url):
+    from urllib.parse import urlsplit
+    parts = urlsplit(url)
+    return parts.hostname, parts.port or (443 if parts.scheme in ('https', 'wss') else 80)
+
+def _interleave_families(infos):
+    """RFC 8305: IPv6和IPv4地址交替排列，IPv6优先"""
+    ipv6 = [info for info in infos if info[0] == socket.AF_INET6]
+    ipv4 = [info for info in infos if info[0] != socket.AF_INET6]
+    ordered = []
+    for index in range(max(len(ipv6), len(ipv4))):
+        ordered.extend(group[index] for group in (ipv6, ipv4) if index < len(group))
+    return ordered
+
+def _happy_eyeballs(infos, timeout=5):
+    """按HAPPY_EYEBALLS_DELAY错开发起TCP连接，返回最先连通的地址（都失败返回None）"""
+    state = {'winner': None, 'pending': len(infos)}
+    lock = threading.Lock()
+    done = threading.Event()
+        
+    def attempt(info):
+        family, sock_type, proto, _, sockaddr = info
+        sock = None
+        try:
+            sock = socket.socket(family, sock_type, proto)
+            sock.settimeout(timeout)
+            sock.connect(sockaddr)
+            with lock:
+                if state['winner'] is None:
+                    state['winner'] = info
+            done.set()
+        except OSError:
+            pass
+        finally:
+            if sock is not None:
+                sock.close()
+            with lock:
+                state['pending'] -= 1
+                if state['pending'] == 0:
+                    done.set()
+        
+    for info in infos:
+        threading.Thread(target=attempt, args=(info,), name=f"happy-eyeballs:{info[4][0]}", daemon=True).start()
+        if done.wait(HAPPY_EYEBALLS_DELAY):
+            break
+    done.wait(timeout)
+    return state['winner']
+
+def resolve_server(url):
+    """解析服务端地址并缓存DNS_CACHE_TTL秒，避免每次重连都重新解析"""
+    host, port = _server_host_port(url)
+    if not host or DNS_CACHE_TTL <= 0:
+        return
+    try:
+        ipaddress.ip_address(host)
+        return  # 已经是IP地址
+    except ValueError:
+        pass
+    entry = _dns_cache.get((host, port))
+    if entry is not None and entry[0] > time.monotonic():
+        return
+        
+    try:
+        infos = _original_getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        print(f"[DNS] ❌ Failed to resolve {host}: {e}")
+        return
+    ordered = _interleave_families(infos)
+    if len({info[0] for info in ordered}) > 1:
+        winner = _happy_eyeballs(ordered)
+        if winner is not None:
+            ordered.remove(winner)
+            ordered.insert(0, winner)
+    _dns_cache[(host, port)] = (time.monotonic() + DNS_CACHE_TTL, ordered)
+    print(f"[DNS] {host} -> {ordered[0][4][0]} (cached for {DNS_CACHE_TTL}s)")
+
+def forget_server_address(url):
+    """丢弃缓存的地址，下一次连接时重新解析"""
+    try:
+        _dns_cache.pop(_server_host_port(url), None)
+    except ValueError:
+        pass
+
+def _is_address_error(error):
+    """异常链中是否有解析失败或网络/主机不可达（说明缓存的地址可能已失效）"""
+    while error is not None:
+        if isinstance(error, socket.gaierror):
+            return True
+        if isinstance(error, OSError) and error.errno in (errno.ENETUNREACH, errno.EHOSTUNREACH, errno.EADDRNOTAVAIL):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def _record_connect_failure(conn, error=None):
+    """普通的连接失败（服务端重启、拒绝连接）保留DNS缓存，避免故障期间每次重连都重新解析和竞速"""
+    conn['failures'] += 1
+    conn['dns_failures'] += 1
+    if _is_address_error(error) or conn['dns_failures'] >= DNS_EVICT_AFTER_FAILURES:
+        forget_server_address(conn['url'])
+        conn['dns_failures'] = 0
+    schedule_reconnect(conn)
+
+# 服务端连接管理
+def _create_server_connection(url):
+    """创建一个服务端连接（Socket.IO客户端 + 连接/注册状态）"""
+    conn = {
+        'url': url,
+        'sio': create_socket_client(),
+        'stable': False,
+        'registered': False,
+        'connecting': False,              # 后台线程正在连接
+        'next_connect': 0,                # 下一次允许尝试连接的时间
+        'reconnect_count': 0,
+        'dns_failures': 0,                # 使用当前缓存地址连续连接失败的次数
+        'backoff': RECONNECT_BASE,        # 上一次的重连等待时间（decorrelated jitter）
+        'retry_after': 0,                 # 服务端提示的最早重试时间
+        'last_registration_attempt': 0,
+        'last_heartbeat': 0,
+        'last_data_send': 0,              # 最近一次成功发送数据的时间
+        'failures': 0,                    # 连续失败次数（连接、注册超时、发送），用于主备切换
+        'active_since': 0,                # failover模式下成为当前服务端的时间
+        'connect_started': None,          # 本次连接开始时间（monotonic）
+        'connect_ms': None                # 最近一次从开始连接到注册成功的耗时
+    }
+    _bind_socket_handlers(conn)
+    return conn
+
+def _is_registered(conn):
+    return conn is not None and conn['sio'].connected and conn['registered']
+
+def get_active_connection():
+    """failover模式下的当前服务端连接"""
+    return _servers[_active_server] if _servers else None
+
+def get_connections_in_use():
+    """需要保持连接的服务端: fanout模式为全部，failover模式为当前服务端（以及正在探测的主服务端）"""
+    if SERVER_MODE == 'fanout':
+        return list(_servers)
+    connections = [get_active_connection()]
+    if _probing_primary and _active_server != 0:
+        connections.append(_servers[0])
+    return connections
+
+# Socket.IO 事件处理器（每个服务端连接单独绑定）
+def _bind_socket_handlers(conn):
+    client = conn['sio']
+    url = conn['url']
+
+    @client.event
+    def connect():
+        print(f"[Socket] ✅ Connected to server: {url}")
+        conn['stable'] = True
+        conn['registered'] = False  # 重置注册状态，等待注册确认
+        conn['last_registration_attempt'] = time.time()
+        # 🔧 连接成功后立即注册，避免延迟
+        print(f"[Socket] 📝 Sending registration request for node: {NODE_NAME}")
+        try:
+            client.emit('register', {'node_name': NODE_NAME})
+            print(f"[Socket] 📤 Registration request sent")
+        except Exception as reg_error:
+            print(f"[Socket] ❌ Failed to send registration: {reg_error}")
+
+    @client.event
+    def disconnect():
+        print(f"[Socket] ❌ Disconnected from server {url} - will attempt reconnection")
+        conn['stable'] = False
+        conn['registered'] = False
+        # 服务端重启时所有节点同时断开，随机等待后再重连
+        schedule_reconnect(conn)
+
+    @client.event
+    def connect_error(data):
+        print(f"[Socket] ❌ Connection error ({url}): {data}")
+        conn['stable'] = False
+        conn['registered'] = False
+        _apply_retry_hint(conn, data)
+
+    @client.event
+    def connection_replaced(data):
+        print(f"[Socket] ⚠️  Connection replaced by new instance: {data.get('message', 'Unknown reason')}")
+        print(f"[Socket] New socket ID: {data.get('new_socket_id', 'Unknown')}")
+        print(f"[Socket] This connection will be closed, allowing new connection to take over")
+        # 不需要做任何特殊处理，让Socket.IO自然断开并重连
+
+    @client.event
+    def registration_success(data):
+        socket_id = data.get('socket_id', 'Unknown')
+        print(f"[Socket] ✅ Node '{NODE_NAME}' registered successfully on {url} (socket: {socket_id})")
+        conn['registered'] = True  # 🔧 确认注册成功
+        conn['failures'] = 0
+        conn['backoff'] = RECONNECT_BASE
+        if conn['connect_started'] is not None:
+            conn['connect_ms'] = round((time.monotonic() - conn['connect_started']) * 1000, 1)
+            conn['connect_started'] = None
+            print(f"[Socket] ⏱️  Connect-to-registered: {conn['connect_ms']}ms via {client.transport()}")
+        print(f"[Socket] 🎉 Registration confirmed, client is now fully operational")
+        if _relay_server is not None:
+            relay_resync(conn)
+
+    @client.event
+    def registration_failed(data):
+        error_msg = data.get('error', 'Unknown error')
+        print(f"[Socket] ❌ Registration failed on {url}: {error_msg}")
+        conn['registered'] = False
+        conn['failures'] += 1
+        _apply_retry_hint(conn, data)
+        print(f"[Socket] 🔄 Will retry registration...")
+
+    @client.event
+    def error(data):
+        print(f"[Socket] ❌ Socket error ({url}): {data}")
+
+    @client.event
+    def request_tcping(data):
+        # 中继模式下发给下游节点的请求转发给对应的agent
+        if not relay_route_down('request_tcping', data):
+            handle_tcping_request(client, data)
+
+    @client.event
+    def relay_registration_success(data):
+        relay_route_down('registration_success', data)
+
+    @client.event
+    def relay_registration_failed(data):
+        relay_route_down('registration_failed', data)
 
 # 🔧 增强TCPing请求处理，添加连接状态检查
-@sio.event
-def request_tcping(data):
-    """响应服务器的tcping请求 - 增强错误处理和数据完整性"""
-    if not sio.connected:
+def handle_tcping_request(client, data):
+    """响应服务器的tcping请求 - 增强错误处理和数据完整性，结果从收到请求的连接返回"""
+    if not client.connected:
         print(f"[TCPing] ❌ Socket not connected, ignoring request")
         return
-        
+
     host = data.get('host')
     port = data.get('port')
     request_id = data.get('request_id', 'unknown')
-    
+
     if not host or not port:
         print(f"[TCPing] ❌ 收到无效请求: host={host}, port={port}")
         return
-    
+
     print(f"[TCPing] Server requested ping to {host}:{port} (request_id: {request_id})")
-    
+
     start_time = time.time()
-    
+
     try:
         # 执行tcping并返回结果
         result = perform_tcping(host, port)
-        
+
         processing_time = (time.time() - start_time) * 1000  # 转换为毫秒
-        
+
         # 增强结果数据
         enhanced_result = {
             **result,
@@ -2578,18 +5005,18 @@ def request_tcping(data):
             'processing_time_ms': round(processing_time, 1),
             'timestamp': int(time.time() * 1000)
         }
-        
+
         print(f"[TCPing] 发送结果: {host}:{port} -> {result['success']} {result.get('latency', 'N/A')}ms (处理耗时: {processing_time:.1f}ms)")
-        
+
         # 🔧 增强发送错误处理，包含连接状态检查
         max_retries = 3
         for retry_count in range(1, max_retries + 1):
             try:
-                if not sio.connected:
+                if not client.connected:
                     print(f"[TCPing] ❌ Socket disconnected during send, aborting")
                     break
-                    
-                sio.emit('tcping_result', enhanced_result)
+
+                client.emit('tcping_result', enhanced_result)
                 break  # 发送成功
             except Exception as emit_error:
                 print(f"[TCPing] 发送结果失败 (尝试 {retry_count}/{max_retries}): {emit_error}")
@@ -2597,7 +5024,7 @@ def request_tcping(data):
                     time.sleep(0.1)  # 短暂等待后重试
                 else:
                     print(f"[TCPing] 发送结果最终失败: {host}:{port}")
-        
+
     except Exception as e:
         print(f"[TCPing] 处理请求异常: {e}")
         # 发送错误结果
@@ -2611,44 +5038,143 @@ def request_tcping(data):
             'timestamp': int(time.time() * 1000)
         }
         try:
-            if sio.connected:
-                sio.emit('tcping_result', error_result)
+            if client.connected:
+                client.emit('tcping_result', error_result)
         except:
             print(f"[TCPing] 无法发送错误结果")
 
-def try_connect():
+def try_connect(conn=None):
     """尝试连接到服务器 - 简化版本"""
+    conn = conn or get_active_connection()
+    client = conn['sio']
     try:
         # 🔧 简化：直接检查连接状态
-        if sio.connected:
+        if client.connected:
             print(f"[Socket] Already connected, skipping connection attempt")
             return True
-            
-        print(f"[Socket] 🔄 Attempting to connect to {SERVER_URL}...")
-        
+
+        print(f"[Socket] 🔄 Attempting to connect to {conn['url']}...")
+        conn['connect_started'] = time.monotonic()
+        resolve_server(conn['url'])
+
         # 🔧 简化：直接连接，不做复杂的清理
-        sio.connect(SERVER_URL, wait_timeout=10)  # 10秒超时
-        
+        client.connect(conn['url'], wait_timeout=10, transports=SOCKET_TRANSPORTS)  # 10秒超时
+
         # 连接成功
-        if sio.connected:
+        if client.connected:
             print(f"[Socket] ✅ Connection established successfully")
+            conn['reconnect_count'] = 0
+            conn['dns_failures'] = 0
             return True
         else:
             print(f"[Socket] ❌ Connection failed - socket not connected after connect()")
+            _record_connect_failure(conn)
             return False
-            
+
     except Exception as e:
         print(f"[Socket] ❌ Connection failed: {e}")
+        _record_connect_failure(conn, e)
         return False
 
-def send_heartbeat():
+def _apply_retry_hint(conn, data):
+    """服务端可以在 connect_error / registration_failed 中返回 retry_after（秒）要求稍后重试"""
+    if isinstance(data, dict) and data.get('retry_after'):
+        try:
+            conn['retry_after'] = time.time() + float(data['retry_after'])
+            print(f"[Socket] ⏳ Server asked to retry after {float(data['retry_after']):.0f}s")
+        except (TypeError, ValueError):
+            pass
+
+def schedule_reconnect(conn):
+    """decorrelated jitter指数退避: 下一次等待时间在 [RECONNECT_BASE, 上一次*3] 之间随机，不超过RECONNECT_MAX"""
+    conn['backoff'] = min(RECONNECT_MAX, random.uniform(RECONNECT_BASE, conn['backoff'] * 3))
+    conn['next_connect'] = max(time.time() + conn['backoff'], conn['retry_after'])
+    print(f"[Socket] ⏳ Next connection attempt to {conn['url']} in {conn['next_connect'] - time.time():.1f}s")
+
+def start_connect(conn):
+    """在后台线程中连接，一个服务端不可达时不影响其他连接的心跳和数据发送"""
+    if conn['connecting']:
+        return
+    conn['connecting'] = True
+
+    def run():
+        try:
+            try_connect(conn)
+        finally:
+            conn['connecting'] = False
+
+    threading.Thread(target=run, name=f"connect:{conn['url']}", daemon=True).start()
+
+def _switch_server(index, now):
+    """failover模式下切换当前服务端，断开原来的连接"""
+    global _active_server, _probing_primary
+    previous = get_active_connection()
+    _active_server = index
+    _probing_primary = False
+    conn = get_active_connection()
+    conn['failures'] = 0
+    conn['reconnect_count'] = 0
+    conn['backoff'] = RECONNECT_BASE
+    conn['next_connect'] = now + random.uniform(0, RECONNECT_BASE)
+    conn['active_since'] = now
+    print(f"[Client] 🔀 Switching server: {previous['url']} -> {conn['url']}")
+    try:
+        if previous['sio'].connected:
+            previous['sio'].disconnect()
+    except Exception as e:
+        print(f"[Client] ⚠️  Error disconnecting from {previous['url']}: {e}")
+
+def check_failover(now):
+    """failover模式: 当前服务端连续失败时切换到下一个，使用备用服务端时定期尝试切回主服务端"""
+    global _probing_primary
+    if len(_servers) < 2:
+        return
+    active = get_active_connection()
+    if active['failures'] >= SERVER_FAILOVER_THRESHOLD:
+        print(f"[Client] ⚠️  Server {active['url']} failed {active['failures']} times in a row")
+        _switch_server((_active_server + 1) % len(_servers), now)
+        return
+    if _active_server == 0:
+        return
+
+    primary = _servers[0]
+    if _probing_primary:
+        if _is_registered(primary):
+            print(f"[Client] ✅ Primary server {primary['url']} is healthy again")
+            _switch_server(0, now)
+        elif primary['failures'] > 0:
+            # 主服务端仍不可用，继续使用备用服务端，稍后再试
+            print(f"[Client] ⚠️  Primary server {primary['url']} still unavailable")
+            _probing_primary = False
+            active['active_since'] = now
+            try:
+                if primary['sio'].connected:
+                    primary['sio'].disconnect()
+            except Exception:
+                pass
+    elif _is_registered(active) and now - active['active_since'] >= SERVER_PRIMARY_RECHECK:
+        print(f"[Client] 🔄 Probing primary server {primary['url']}...")
+        primary['failures'] = 0
+        primary['reconnect_count'] = 0
+        primary['backoff'] = RECONNECT_BASE
+        primary['next_connect'] = 0
+        _probing_primary = True
+
+def send_heartbeat(conn=None):
     """发送心跳包 - 增强连接检测"""
-    if sio.connected:
+    conn = conn or get_active_connection()
+    client = conn['sio']
+    if client.connected:
         try:
-            sio.emit('heartbeat', {
+            client.emit('heartbeat', {
                 'node_name': NODE_NAME,
                 'timestamp': int(time.time() * 1000),
-                'version': CLIENT_VERSION
+                'version': CLIENT_VERSION,
+                # 异常的采集器，服务端据此区分采集卡死和主机离线
+                'failing_collectors': [name for name, collector in _collectors.items()
+                                       if collector['status'] not in ('ok', 'pending')],
+                'connect_ms': conn['connect_ms'],
+                'transport': client.transport()
             })
             # 只在调试模式下显示心跳日志
             # print(f"[Socket] ❤️ Heartbeat sent")
@@ -2657,83 +5183,242 @@ def send_heartbeat():
             return False
     return True
 
-def send_data():
-    """发送监控数据 - 增强错误处理和连接检查"""
-    global _last_successful_data_send, _connection_stable
-    
-    if not sio.connected:
+def send_data(data=None, conn=None):
+    """发送监控数据 - 增强错误处理和连接检查（data为None时现场采集，conn为None时发送到当前服务端）"""
+    conn = conn or get_active_connection()
+    client = conn['sio']
+
+    if not client.connected:
         print(f"[Client] ⚠️  Socket not connected, skipping data send")
-        _connection_stable = False
+        conn['stable'] = False
         return False
-        
-    if not _registration_confirmed:
+
+    if not conn['registered']:
         print(f"[Client] ⚠️  Node not registered yet, skipping data send")
         return False
-        
+
     try:
         # 收集系统信息
-        data = collect_info()
-        
+        if data is None:
+            data = collect_info()
+
         # 发送数据，包含重试机制
         max_retries = 3
         for attempt in range(1, max_retries + 1):
             try:
-                if not sio.connected:
+                if not client.connected:
                     print(f"[Client] ❌ Socket disconnected during send attempt {attempt}")
-                    _connection_stable = False
+                    conn['stable'] = False
                     return False
-                    
-                sio.emit('report_data', data)
+
+                client.emit('report_data', data)
                 # 只在第一次尝试或重试成功时显示详细日志
                 if attempt == 1:
-                    print(f"[Client] ✅ Data sent: CPU={data['cpu']}% RAM={data['ram']}% ROM={data['rom']}%")
+                    print(f"[Client] ✅ Data sent to {conn['url']}: CPU={data['cpu']}% RAM={data['ram']}% ROM={data['rom']}%")
                 elif attempt > 1:
                     print(f"[Client] ✅ Data sent successfully (attempt {attempt})")
-                
+
                 # 🔧 记录成功发送时间
-                _last_successful_data_send = time.time()
-                _connection_stable = True
+                conn['last_data_send'] = time.time()
+                conn['stable'] = True
                 return True
-                
+
             except Exception as send_error:
                 print(f"[Client] ❌ Failed to send data (attempt {attempt}/{max_retries}): {send_error}")
-                _connection_stable = False
+                conn['stable'] = False
                 if attempt < max_retries:
                     time.sleep(0.5)  # 等待0.5秒后重试
                 else:
+                    conn['failures'] += 1
                     return False
-                    
+
     except Exception as e:
         print(f"[Client] ❌ Failed to collect or send data: {e}")
-        _connection_stable = False
+        conn['stable'] = False
+        return False
+
+_servers = [_create_server_connection(url) for url in [SERVER_URL] + EXTRA_SERVER_URLS]
+sio = _servers[0]['sio']  # 主服务端的客户端
+
+# 中继模式: 接受附近agent的连接，把它们的消息批量通过本节点的上游连接转发
+# 上游事件: relay_register / relay_unregister {'node_name', 'relay'}
+#           relay_batch {'relay', 'events': [{'event', 'node_name', 'data'}]}
+# 下行事件: relay_registration_success / relay_registration_failed / request_tcping 带 node_name，转发给对应agent
+_relay_server = None
+_relay_nodes = {}       # node_name -> 下游sid
+_relay_sids = {}        # 下游sid -> node_name
+_relay_lock = threading.Lock()
+_relay_queue = None     # 待转发的下游消息（有界deque，上游不可用时丢弃最旧的）
+_relay_wakeup = threading.Event()
+
+def _relay_upstreams():
+    return [conn for conn in get_connections_in_use() if _is_registered(conn)]
+
+def _relay_emit_upstream(event, data):
+    """发送到所有已注册的上游连接，至少一个成功时返回True"""
+    sent = False
+    for conn in _relay_upstreams():
+        try:
+            conn['sio'].emit(event, data)
+            sent = True
+        except Exception as e:
+            print(f"[Relay] ❌ Failed to forward {event} to {conn['url']}: {e}")
+    return sent
+
+def relay_resync(conn):
+    """上游（重新）注册后，重新注册所有下游节点"""
+    with _relay_lock:
+        nodes = list(_relay_nodes)
+    for node_name in nodes:
+        try:
+            conn['sio'].emit('relay_register', {'node_name': node_name, 'relay': NODE_NAME})
+        except Exception as e:
+            print(f"[Relay] ❌ Failed to re-register {node_name}: {e}")
+    if nodes:
+        print(f"[Relay] 📝 Re-registered {len(nodes)} downstream nodes on {conn['url']}")
+
+def relay_route_down(event, data):
+    """把上游发给下游节点的事件转发给对应agent，不是下游节点时返回False"""
+    if _relay_server is None:
+        return False
+    node_name = data.get('node_name')
+    if not node_name or node_name == NODE_NAME:
         return False
+    with _relay_lock:
+        sid = _relay_nodes.get(node_name)
+    if sid is None:
+        print(f"[Relay] ⚠️  {event} for unknown node {node_name}, dropping")
+        return True
+    _relay_server.emit(event, data, to=sid)
+    return True
+
+def _relay_enqueue(sid, event, data, urgent=False):
+    with _relay_lock:
+        node_name = _relay_sids.get(sid)
+    if node_name is None:
+        return  # 未注册的下游连接
+    _relay_queue.append({'event': event, 'node_name': node_name, 'data': data})
+    if urgent or len(_relay_queue) >= RELAY_BATCH_SIZE:
+        _relay_wakeup.set()
+
+def _relay_flush_loop():
+    """按 RELAY_FLUSH_INTERVAL 批量转发，上游不可用时消息保留在有界队列中"""
+    while True:
+        _relay_wakeup.wait(RELAY_FLUSH_INTERVAL)
+        _relay_wakeup.clear()
+        while _relay_queue and _relay_upstreams():
+            batch = []
+            while _relay_queue and len(batch) < RELAY_BATCH_SIZE:
+                batch.append(_relay_queue.popleft())
+            if not _relay_emit_upstream('relay_batch', {'relay': NODE_NAME, 'events': batch}):
+                _relay_queue.extendleft(reversed(batch))
+                break
+
+def _bind_relay_handlers(server):
+    @server.event
+    def connect(sid, environ):
+        print(f"[Relay] Agent connected: {sid} ({environ.get('REMOTE_ADDR')})")
+
+    @server.event
+    def disconnect(sid):
+        with _relay_lock:
+            node_name = _relay_sids.pop(sid, None)
+            if node_name is None or _relay_nodes.get(node_name) != sid:
+                return
+            del _relay_nodes[node_name]
+        print(f"[Relay] Agent disconnected: {node_name}")
+        _relay_emit_upstream('relay_unregister', {'node_name': node_name, 'relay': NODE_NAME})
+
+    @server.event
+    def register(sid, data):
+        node_name = (data or {}).get('node_name')
+        if not node_name:
+            server.emit('registration_failed', {'error': 'Missing node_name'}, to=sid)
+            return
+        with _relay_lock:
+            previous = _relay_nodes.get(node_name)
+            _relay_nodes[node_name] = sid
+            _relay_sids[sid] = node_name
+        if previous is not None and previous != sid:
+            # 与服务端行为一致: 同名节点的新连接替换旧连接
+            server.emit('connection_replaced', {'message': 'Node registered from another connection', 'new_socket_id': sid}, to=previous)
+            with _relay_lock:
+                _relay_sids.pop(previous, None)
+            server.disconnect(previous)
+        print(f"[Relay] 📝 Registering downstream node: {node_name}")
+        # 注册结果由上游返回 relay_registration_success/failed 后转发给agent
+        if not _relay_emit_upstream('relay_register', {'node_name': node_name, 'relay': NODE_NAME}):
+            server.emit('registration_failed', {'error': 'Relay upstream not connected'}, to=sid)
+
+    @server.event
+    def report_data(sid, data):
+        _relay_enqueue(sid, 'report_data', data)
+
+    @server.event
+    def heartbeat(sid, data):
+        _relay_enqueue(sid, 'heartbeat', data)
+
+    @server.event
+    def tcping_result(sid, data):
+        _relay_enqueue(sid, 'tcping_result', data, urgent=True)
+
+def start_relay_server():
+    """启动中继服务（RELAY_LISTEN 为 None 时不启动）"""
+    global _relay_server, _relay_queue
+    if RELAY_LISTEN is None or _relay_server is not None:
+        return
+    import collections
+    import socketserver
+    from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+        
+    class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass  # 长轮询请求很频繁，不打印访问日志
+        
+    try:
+        # wsgiref不支持websocket升级，下游agent使用长轮询
+        server = socketio.Server(async_mode='threading', allow_upgrades=False)
+        _bind_relay_handlers(server)
+        httpd = make_server(RELAY_LISTEN[0], RELAY_LISTEN[1], socketio.WSGIApp(server),
+                            server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    except Exception as e:
+        print(f"[Relay] ❌ Failed to start relay on {RELAY_LISTEN}: {e}")
+        return
+    _relay_queue = collections.deque(maxlen=RELAY_QUEUE_SIZE)
+    _relay_server = server
+    threading.Thread(target=httpd.serve_forever, name="relay-http", daemon=True).start()
+    threading.Thread(target=_relay_flush_loop, name="relay-flush", daemon=True).start()
+    print(f"[Relay] Relay listening on http://{RELAY_LISTEN[0]}:{RELAY_LISTEN[1]}")
 
 def test_connection_stability():
     """测试连接稳定性 - 可选的诊断功能"""
     print(f"[Test] 🔧 Testing connection stability...")
-    
+        
     # 测试基本连接
     if try_connect():
         print(f"[Test] ✅ Basic connection test passed")
-        
+            
         # 测试数据发送
         if send_data():
             print(f"[Test] ✅ Data transmission test passed")
         else:
             print(f"[Test] ❌ Data transmission test failed")
-        
+            
         # 测试心跳
         if send_heartbeat():
             print(f"[Test] ✅ Heartbeat test passed")
         else:
             print(f"[Test] ❌ Heartbeat test failed")
-        
+            
         # 断开连接进行重连测试
         print(f"[Test] 🔄 Testing reconnection mechanism...")
         try:
             sio.disconnect()
             time.sleep(2)  # 等待2秒
-            
+                
             if try_connect():
                 print(f"[Test] ✅ Reconnection test passed")
             else:
@@ -2742,7 +5427,7 @@ def test_connection_stability():
             print(f"[Test] ❌ Reconnection test error: {e}")
     else:
         print(f"[Test] ❌ Basic connection test failed")
-    
+        
     print(f"[Test] 🏁 Connection stability test completed")
 
 def main():
@@ -2751,116 +5436,105 @@ def main():
     print(f"[Client] Node Name: {NODE_NAME}")
     print(f"[Client] Server URL: {SERVER_URL}")
     print(f"[Client] Location: {NODE_LOCATION}")
-    
+    start_metrics_server()
+    start_output_sinks()
+    start_relay_server()
+        
     # 🔧 简化参数配置 - 用户建议的简单方案
     data_send_interval = 5          # 5秒发送数据间隔
     heartbeat_interval = 30         # 30秒心跳间隔
-    reconnect_interval = 2          # 🔧 简化：2秒重连间隔
-    max_reconnect_attempts = 1000   # 🔧 简化：最多1000次重连尝试
-    registration_timeout = 10       # 🔧 修复：注册超时时间
-    
+    registration_timeout = 10       # 🔧 修复：注册超时时间（重试时再随机增加最多一倍）
+        
     # 简化状态跟踪变量
     last_data_send = 0
-    last_heartbeat = 0
-    last_registration_attempt = 0
-    reconnect_count = 0             # 🔧 简化：重连计数器
-    
-    # 🔧 第一次连接尝试
-    print(f"[Client] 🔄 Initial connection attempt...")
-    if try_connect():
-        reconnect_count = 0
-        last_registration_attempt = time.time()  # 记录注册时间
-        print(f"[Client] ✅ Initial connection successful")
-    else:
-        reconnect_count = 1
-        print(f"[Client] ❌ Initial connection failed, will start reconnection attempts")
-    
+        
+    if len(_servers) > 1:
+        print(f"[Client] Servers ({SERVER_MODE}): {', '.join(conn['url'] for conn in _servers)}")
+    get_active_connection()['active_since'] = time.time()
+        
+    # 随机延迟首次连接，避免整个集群同时启动时集中连接和注册
+    for conn in _servers:
+        conn['next_connect'] = time.time() + random.uniform(0, STARTUP_JITTER)
+        
     print(f"[Client] 🔁 Entering main monitoring loop...")
-    print(f"[Client] 📋 Reconnect policy: {reconnect_interval}s interval, max {max_reconnect_attempts} attempts")
-    
+    print(f"[Client] 📋 Reconnect policy: jittered backoff {RECONNECT_BASE}-{RECONNECT_MAX}s, never giving up")
+        
     try:
         while True:
-            current_time = time.time()
-            
-            # 🔧 简化连接检查 - 直接检查Socket状态
-            if not sio.connected:
-                # Socket断开，立即尝试重连
-                if reconnect_count < max_reconnect_attempts:
-                    reconnect_count += 1
-                    print(f"[Client] 🔄 Reconnection attempt #{reconnect_count}/{max_reconnect_attempts}...")
+            try:
+                current_time = time.time()
+                
+                # 🔧 采样并分发给所有输出（Socket.IO仅在连接且已注册时发送，发送在各sink线程中进行）
+                # 放在连接检查之前，服务端不可达时其他输出仍能收到数据
+                # 首次采集较慢的采集器完成后立即补发，不等到下一个发送间隔
+                if (current_time - last_data_send >= data_send_interval or first_results_ready()) and needs_sampling():
+                    last_data_send = current_time
+                    publish_sample(collect_info())
+                
+                connections = get_connections_in_use()
+                for conn in connections:
+                    client = conn['sio']
                     
-                    if try_connect():
-                        reconnect_count = 0  # 重连成功，重置计数器
-                        last_registration_attempt = current_time  # 记录注册时间
-                        print(f"[Client] ✅ Reconnection successful, waiting for registration...")
-                        # 重连成功后稍微延迟再发送数据
-                        last_data_send = current_time + 2  # 2秒后可以发送数据
-                        last_heartbeat = current_time + 3  # 3秒后发送心跳
-                    else:
-                        print(f"[Client] ❌ Reconnection failed, waiting {reconnect_interval}s...")
-                        time.sleep(reconnect_interval)
+                    # 🔧 简化连接检查 - 直接检查Socket状态，连接在后台线程中进行
+                    if not client.connected:
+                        if conn['connecting'] or current_time < conn['next_connect']:
+                            continue
+                        conn['reconnect_count'] += 1
+                        print(f"[Client] 🔄 Connection attempt #{conn['reconnect_count']} to {conn['url']}...")
+                        start_connect(conn)
                         continue
-                else:
-                    # 达到最大重连次数，停止尝试
-                    print(f"[Client] 😴 Maximum reconnection attempts ({max_reconnect_attempts}) reached")
-                    print(f"[Client] 🛑 Stopping client - please check server connectivity")
-                    break
-            
-            # 🔧 修复：检查注册状态，如果连接但未注册且超时，重新尝试注册
-            elif not _registration_confirmed:
-                if current_time - last_registration_attempt > registration_timeout:
-                    print(f"[Client] ⚠️  Registration timeout, retrying...")
-                    try:
-                        sio.emit('register', {'node_name': NODE_NAME})
-                        last_registration_attempt = current_time
-                    except Exception as reg_error:
-                        print(f"[Client] ❌ Registration retry failed: {reg_error}")
-                        # 注册失败可能是连接问题，下次循环会检测到并重连
-            
-            # 🔧 发送监控数据 (仅在连接且已注册时)
-            if sio.connected and _registration_confirmed and current_time - last_data_send >= data_send_interval:
-                last_data_send = current_time
+                    
+                    # 🔧 修复：检查注册状态，如果连接但未注册且超时，重新尝试注册
+                    if (not conn['registered'] and current_time - conn['last_registration_attempt'] > registration_timeout
+                            and current_time >= conn['retry_after']):
+                        print(f"[Client] ⚠️  Registration timeout on {conn['url']}, retrying...")
+                        conn['failures'] += 1
+                        try:
+                            client.emit('register', {'node_name': NODE_NAME})
+                            # 随机推迟下一次重试，分散服务端恢复时的注册请求
+                            conn['last_registration_attempt'] = current_time + random.uniform(0, registration_timeout)
+                        except Exception as reg_error:
+                            print(f"[Client] ❌ Registration retry failed: {reg_error}")
+                            # 注册失败可能是连接问题，下次循环会检测到并重连
+                    
+                    # 🔧 发送心跳包 (仅在连接时)
+                    if current_time - conn['last_heartbeat'] >= heartbeat_interval:
+                        conn['last_heartbeat'] = current_time
+                        
+                        if not send_heartbeat(conn):
+                            # 心跳失败，可能是连接问题
+                            print(f"[Client] ⚠️  Heartbeat failed, connection may be unstable")
                 
-                if send_data():
-                    # 数据发送成功，连接稳定
-                    pass  # _connection_stable在send_data中已设置
-                else:
-                    # 数据发送失败，可能是连接问题
-                    print(f"[Client] ⚠️  Data send failed, connection may be unstable")
-            
-            # 🔧 发送心跳包 (仅在连接时)
-            if sio.connected and current_time - last_heartbeat >= heartbeat_interval:
-                last_heartbeat = current_time
+                if SERVER_MODE != 'fanout':
+                    check_failover(current_time)
                 
-                if not send_heartbeat():
-                    # 心跳失败，可能是连接问题
-                    print(f"[Client] ⚠️  Heartbeat failed, connection may be unstable")
+                # 🔧 简化休眠逻辑
+                if all(_is_registered(conn) for conn in connections):
+                    sleep_time = 1.0  # 连接正常时短休眠
+                else:
+                    sleep_time = 0.5  # 未连接或未注册时短休眠，快速检测状态
+            except Exception as e:
+                # 单次循环的异常只记录，代理不能因此退出（只有KeyboardInterrupt结束主循环）
+                print(f"[Client] ❌ Unexpected error in main loop: {e}")
+                import traceback
+                traceback.print_exc()
+                sleep_time = 1.0
             
-            # 🔧 简化休眠逻辑
-            if sio.connected and _registration_confirmed:
-                sleep_time = 1.0  # 连接正常时短休眠
-            elif sio.connected:
-                sleep_time = 0.5  # 连接但未注册时短休眠，快速检测注册状态
-            else:
-                sleep_time = 0.5  # 断开连接时短休眠，快速重连
-                
             time.sleep(sleep_time)
     except KeyboardInterrupt:
         print(f"\n[Client] 🛑 Keyboard interrupt received")
-    except Exception as e:
-        print(f"[Client] ❌ Unexpected error in main loop: {e}")
-        import traceback
-        traceback.print_exc()
     finally:
         # 清理工作
         print(f"[Client] 🧹 Cleaning up...")
-        try:
-            if sio.connected:
-                print(f"[Client] 📡 Disconnecting from server...")
-                sio.disconnect()
-                time.sleep(1)  # 给断开连接一些时间
-        except Exception as cleanup_error:
-            print(f"[Client] ⚠️  Cleanup error: {cleanup_error}")
+        stop_exec_workers()
+        for conn in _servers:
+            try:
+                if conn['sio'].connected:
+                    print(f"[Client] 📡 Disconnecting from server {conn['url']}...")
+                    conn['sio'].disconnect()
+                    time.sleep(1)  # 给断开连接一些时间
+            except Exception as cleanup_error:
+                print(f"[Client] ⚠️  Cleanup error: {cleanup_error}")
         
         print(f"[Client] 👋 Client stopped")
 
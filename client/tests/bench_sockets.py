@@ -0,0 +1,117 @@
+"""parse_sock_diag_messages / parse_proc_net_tcp 性能基准
+
+用同一张合成套接字表（--sockets 个，按常见比例分布在各TCP状态和端口上）分别生成
+netlink inet_diag 响应和 /proc/net/tcp 文本，计时两种解析路径，并校验两者的统计结果一致。
+
+    python client/tests/bench_sockets.py --sockets 100000 --rounds 10
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import client  # noqa: E402
+
+# 内核每次recv大约返回一页多的消息，按此切分批次
+BATCH_BYTES = 32 * 1024
+# 状态分布: 大量ESTABLISHED和TIME_WAIT，少量监听和其他状态
+STATE_WEIGHTS = {1: 60, 6: 25, 8: 5, 10: 2, 2: 2, 3: 2, 4: 2, 5: 2}
+LISTEN_PORTS = [22, 80, 443, 3306, 6379, 8008, 8080, 9100]
+
+
+def make_sockets(count, seed=0):
+    """生成 (state, sport, rqueue, wqueue) 列表"""
+    rng = random.Random(seed)
+    states = rng.choices(list(STATE_WEIGHTS), weights=list(STATE_WEIGHTS.values()), k=count)
+    sockets = []
+    for state in states:
+        if state == client.TCP_LISTEN:
+            sockets.append((state, rng.choice(LISTEN_PORTS), rng.randint(0, 5), 4096))
+        elif state == client.TCP_ESTABLISHED and rng.random() < 0.7:
+            sockets.append((state, rng.choice(LISTEN_PORTS), 0, 0))  # 入站连接
+        else:
+            sockets.append((state, rng.randint(32768, 60999), 0, 0))
+    return sockets
+
+
+def build_sock_diag_batches(sockets):
+    """按netlink格式编码: nlmsghdr(16字节) + inet_diag_msg(72字节)，以NLMSG_DONE结束"""
+    batches = []
+    batch = bytearray()
+    for seq, (state, sport, rqueue, wqueue) in enumerate(sockets):
+        # family, state, timer, retrans, sockid(sport/dport大端 + 地址 + 接口 + cookie), expires, rqueue, wqueue, uid, inode
+        body = (struct.pack('=BBBB', 2, state, 0, 0) + struct.pack('>HH', sport, 443) + bytes(44)
+                + struct.pack('=IIIII', 0, rqueue, wqueue, 1000, seq))
+        batch += struct.pack('=IHHII', 16 + len(body), client.SOCK_DIAG_BY_FAMILY, 0x2, 1, 0) + body
+        if len(batch) + 88 > BATCH_BYTES:
+            batches.append(bytes(batch))
+            batch = bytearray()
+    batch += struct.pack('=IHHII', 20, client.NLMSG_DONE, 0x2, 1, 0) + bytes(4)
+    batches.append(bytes(batch))
+    return batches
+
+
+def build_proc_net_tcp(sockets):
+    """按 /proc/net/tcp 的格式编码数据行（不含表头）"""
+    return [
+        (f"{seq:4d}: 0100007F:{sport:04X} 0200007F:01BB {state:02X} "
+         f"{wqueue:08X}:{rqueue:08X} 00:00000000 00000000  1000        0 {seq} 1 0000000000000000 100 0 0 10 0\n").encode()
+        for seq, (state, sport, rqueue, wqueue) in enumerate(sockets)
+    ]
+
+
+def bench(rounds, parse):
+    timings = []
+    summary = None
+    for _ in range(rounds):
+        summary = client._new_socket_summary()
+        started = time.perf_counter()
+        parse(summary)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings), summary
+
+
+def parse_batches(batches, summary):
+    buffer = bytearray(BATCH_BYTES + 64)
+    view = memoryview(buffer)
+    for batch in batches:
+        # 与_dump_sock_diag一样复用接收缓冲区
+        length = len(batch)
+        view[:length] = batch
+        if client.parse_sock_diag_messages(view, length, summary):
+            return
+    raise AssertionError("NLMSG_DONE not reached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sockets', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    sockets = make_sockets(args.sockets)
+    batches = build_sock_diag_batches(sockets)
+    lines = build_proc_net_tcp(sockets)
+
+    netlink, netlink_summary = bench(args.rounds, lambda summary: parse_batches(batches, summary))
+    proc, proc_summary = bench(args.rounds, lambda summary: client.parse_proc_net_tcp(lines, summary))
+
+    # /proc/net/tcp 看不到backlog上限，只比较其余字段
+    assert netlink_summary['states'] == proc_summary['states']
+    assert netlink_summary['established_ports'] == proc_summary['established_ports']
+    assert {port: queued for port, (queued, _) in netlink_summary['listen'].items()} == \
+        {port: queued for port, (queued, _) in proc_summary['listen'].items()}
+
+    print(f"sockets: {args.sockets}  rounds: {args.rounds}  netlink batches: {len(batches)}")
+    for name, timings in (('parse_sock_diag_messages', netlink), ('parse_proc_net_tcp', proc)):
+        median = timings[len(timings) // 2]
+        print(f"{name}: median {median * 1000:.1f}ms  min {timings[0] * 1000:.1f}ms  "
+              f"({median / args.sockets * 1e9:.0f}ns/socket)")
+
+
+if __name__ == '__main__':
+    main()
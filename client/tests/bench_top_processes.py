@@ -0,0 +1,135 @@
+"""get_top_processes 性能基准
+
+默认在临时目录中生成一个合成的 /proc（--processes 个进程，每轮有 --churn 比例的进程退出并被新进程替换），
+用 --real 则直接采集本机的 /proc。每轮采集前都会更新CPU时钟数，使增量计算路径被完整覆盖。
+
+    python client/tests/bench_top_processes.py --processes 5000 --rounds 20
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import client  # noqa: E402
+
+
+class _FakeProcOS:
+    """把对 /proc 的访问重定向到合成目录，其余调用交给真实的os模块"""
+
+    def __init__(self, root):
+        self._root = root
+
+    def _path(self, path):
+        if path == '/proc' or path.startswith('/proc/'):
+            return self._root + path[len('/proc'):]
+        return path
+
+    def listdir(self, path):
+        return os.listdir(self._path(path))
+
+    def open(self, path, flags, *args):
+        return os.open(self._path(path), flags, *args)
+
+    def __getattr__(self, name):
+        return getattr(os, name)
+
+
+def _stat_line(pid, name, start, ticks, rss):
+    # pid (comm) state，之后依次为stat的第4~44列；utime/stime/starttime/rss位于第14/15/22/24列
+    fields = ['S'] + ['0'] * 41
+    fields[11] = str(ticks // 2)
+    fields[12] = str(ticks - ticks // 2)
+    fields[19] = str(start)
+    fields[21] = str(rss)
+    return f"{pid} ({name}) {' '.join(fields)}\n"
+
+
+class SyntheticProc:
+    def __init__(self, count, churn, seed=0):
+        self.root = tempfile.mkdtemp(prefix='bench-proc-')
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 1
+        self.next_start = 1000
+        self.processes = {}
+        for _ in range(count):
+            self._spawn()
+        # 非PID目录应被跳过
+        for entry in ('self', 'net', 'sys'):
+            os.mkdir(os.path.join(self.root, entry))
+
+    def _spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        self.next_start += 1
+        # 部分进程名包含空格和括号，覆盖按最后一个')'切分的路径
+        name = self.random.choice(['nginx', 'python3', 'kworker/0:1', 'Web Content', 'weird) name'])
+        self.processes[pid] = [name, self.next_start, 0, self.random.randint(100, 500000)]
+        os.mkdir(os.path.join(self.root, str(pid)))
+
+    def advance(self):
+        """推进一轮：所有进程累加CPU时钟数，按churn比例替换进程"""
+        for pid in self.random.sample(sorted(self.processes), int(len(self.processes) * self.churn)):
+            del self.processes[pid]
+            shutil.rmtree(os.path.join(self.root, str(pid)))
+            self._spawn()
+        for pid, proc in self.processes.items():
+            proc[2] += self.random.randint(0, 20)
+            with open(os.path.join(self.root, str(pid), 'stat'), 'w') as f:
+                f.write(_stat_line(pid, *proc))
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def run(rounds, advance=None):
+    client._process_table.clear()
+    client._process_table_time = None
+    timings = []
+    result = None
+    for _ in range(rounds):
+        if advance:
+            advance()
+        started = time.perf_counter()
+        result = client.get_top_processes()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=5000, help='合成进程表的进程数')
+    parser.add_argument('--churn', type=float, default=0.02, help='每轮被替换的进程比例')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--real', action='store_true', help='采集本机的 /proc 而不是合成进程表')
+    args = parser.parse_args()
+
+    if args.real:
+        timings, result = run(args.rounds, advance=lambda: time.sleep(0.1))
+    else:
+        proc = SyntheticProc(args.processes, args.churn)
+        real_os = client.os
+        client.os = _FakeProcOS(proc.root)
+        try:
+            timings, result = run(args.rounds, advance=proc.advance)
+        finally:
+            client.os = real_os
+            proc.close()
+
+    if result is None:
+        sys.exit("get_top_processes failed")
+    # 第一轮需要建立进程表缓存，单独列出
+    steady = sorted(timings[1:]) or timings
+    print(f"processes: {result['count']}  rounds: {len(timings)}")
+    print(f"first cycle: {timings[0] * 1000:.1f}ms")
+    print(f"steady cycle: median {steady[len(steady) // 2] * 1000:.1f}ms  "
+          f"min {steady[0] * 1000:.1f}ms  max {steady[-1] * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import client  # noqa: E402
+
+# 合成的 /proc/self/mountinfo: bind mount、btrfs子卷、overlay、ZFS数据集（含重复挂载）和转义路径
+MOUNTINFO = r"""22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+23 22 8:1 /srv/data /mnt/data\040bind rw,relatime shared:1 - ext4 /dev/sda1 rw
+24 22 0:40 / /home rw,relatime shared:2 - btrfs /dev/sdb1 rw,subvol=/@home
+25 22 0:40 / /var/lib/snapshots rw,relatime shared:3 - btrfs /dev/sdb1 rw,subvol=/@snapshots
+26 22 0:50 / /var/lib/docker/overlay2/abc/merged rw,relatime - overlay overlay rw,lowerdir=/l,upperdir=/u,workdir=/w
+27 22 0:60 / /tank/a rw,relatime shared:4 - zfs tank/a rw
+28 22 0:61 / /tank/b rw,relatime shared:5 - zfs tank/b rw
+29 22 0:60 / /mnt/a-bind rw,relatime shared:4 - zfs tank/a rw
+"""
+
+ROOT = {'total': 1000, 'used': 400, 'free': 600, 'inodes_total': 100, 'inodes_free': 60}
+BTRFS = {'total': 5000, 'used': 1000, 'free': 4000, 'inodes_total': 0, 'inodes_free': 0}
+TANK_A = {'total': 1200, 'used': 200, 'free': 1000, 'inodes_total': 1300, 'inodes_free': 1000}
+TANK_B = {'total': 1100, 'used': 100, 'free': 1000, 'inodes_total': 1200, 'inodes_free': 1000}
+USAGE = {
+    '/': ROOT,
+    '/mnt/data bind': ROOT,
+    '/home': BTRFS,
+    '/var/lib/snapshots': BTRFS,
+    '/var/lib/docker/overlay2/abc/merged': ROOT,   # overlay的容量与底层ext4一致
+    '/tank/a': TANK_A,
+    '/tank/b': TANK_B,
+    '/mnt/a-bind': TANK_A,
+}
+
+
+class ParseMountinfoTest(unittest.TestCase):
+    def test_fields_and_escapes(self):
+        mounts = client.parse_mountinfo(MOUNTINFO)
+        self.assertEqual(len(mounts), 8)
+        bind = mounts[1]
+        self.assertEqual(bind['mountpoint'], '/mnt/data bind')
+        self.assertEqual(bind['root'], '/srv/data')
+        self.assertEqual(bind['dev_id'], '8:1')
+        self.assertEqual(bind['fstype'], 'ext4')
+        self.assertEqual(bind['device'], '/dev/sda1')
+        self.assertEqual(mounts[4]['fstype'], 'overlay')
+        self.assertEqual(mounts[7]['device'], 'tank/a')
+
+    def test_skips_malformed_lines(self):
+        self.assertEqual(client.parse_mountinfo("garbage line\n\n"), [])
+
+
+class AggregateFilesystemsTest(unittest.TestCase):
+    def aggregate(self):
+        mounts = client.parse_mountinfo(MOUNTINFO)
+        return {fs['id']: fs for fs in client.aggregate_filesystems(
+            [(mount, dict(USAGE[mount['mountpoint']])) for mount in mounts])}
+
+    def test_bind_mount_and_overlay_fold_into_backing_filesystem(self):
+        root = self.aggregate()['8:1']
+        self.assertEqual(root['used'], 400)
+        self.assertEqual(root['total'], 1000)
+        self.assertEqual(sorted(root['mountpoints']),
+                         ['/', '/mnt/data bind', '/var/lib/docker/overlay2/abc/merged'])
+
+    def test_btrfs_subvolumes_counted_once(self):
+        btrfs = self.aggregate()['0:40']
+        self.assertEqual(btrfs['used'], 1000)
+        self.assertEqual(btrfs['mountpoints'], ['/home', '/var/lib/snapshots'])
+
+    def test_zfs_datasets_summed_per_pool_without_double_counting(self):
+        filesystems = self.aggregate()
+        tank = filesystems['zfs:tank']
+        self.assertEqual(tank['used'], 300)
+        self.assertEqual(tank['free'], 1000)
+        self.assertEqual(tank['total'], 1300)
+        self.assertEqual(tank['inodes_used'], 500)
+        self.assertEqual(sorted(tank['mountpoints']), ['/mnt/a-bind', '/tank/a', '/tank/b'])
+        self.assertEqual(len(filesystems), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()